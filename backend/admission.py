@@ -0,0 +1,128 @@
+"""
+Admission control for backend_api.py.
+
+Each endpoint belongs to a lane with its own concurrency limit, bounded
+wait queue and queue deadline. Lanes have a priority: while a higher
+priority lane is saturated, lower priority requests are shed straight
+away so cheap risk scoring keeps its latency under bursts of LLM traffic.
+"""
+
+import asyncio
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class Lane:
+    """Concurrency limit and wait queue for one class of endpoints"""
+
+    def __init__(self, name: str, paths: List[str], max_concurrent: int,
+                 max_queue: int, queue_timeout: float, priority: int = 0,
+                 degrade: bool = False):
+        self.name = name
+        self.paths = paths
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        # Lower number = more important
+        self.priority = priority
+        # Degradable lanes are served a fallback instead of a 503 when shed
+        self.degrade = degrade
+        self.active = 0
+        self.waiters: "deque[asyncio.Future]" = deque()
+        self.admitted = 0
+        self.shed = 0
+
+    def saturated(self) -> bool:
+        return self.active >= self.max_concurrent or bool(self.waiters)
+
+    def snapshot(self) -> Dict:
+        return {
+            "active": self.active,
+            "queued": len(self.waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "priority": self.priority,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+class AdmissionController:
+    """Per-lane admission with FIFO queues, deadlines and priority shedding"""
+
+    def __init__(self, lanes: List[Lane]):
+        self.lanes = {lane.name: lane for lane in lanes}
+        self._by_path = {path: lane for lane in lanes for path in lane.paths}
+
+    def lane_for(self, path: str) -> Optional[Lane]:
+        return self._by_path.get(path)
+
+    async def admit(self, lane: Lane) -> bool:
+        """
+        Wait for a slot in `lane`.
+
+        Returns True once a slot is held (release it with `release`), or
+        False if the request was shed.
+        """
+        if self._higher_priority_saturated(lane):
+            lane.shed += 1
+            return False
+
+        if lane.active < lane.max_concurrent and not lane.waiters:
+            lane.active += 1
+            lane.admitted += 1
+            return True
+
+        if len(lane.waiters) >= lane.max_queue:
+            lane.shed += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), lane.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just as the deadline hit; pass it on
+                self.release(lane)
+            else:
+                waiter.cancel()
+            lane.shed += 1
+            return False
+        except asyncio.CancelledError:
+            # Client went away while queued; a slot handed over in the
+            # meantime would otherwise leak and shrink the lane for good
+            if waiter.done() and not waiter.cancelled():
+                self.release(lane)
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if waiter in lane.waiters:
+                lane.waiters.remove(waiter)
+
+        lane.admitted += 1
+        return True
+
+    def release(self, lane: Lane):
+        """Free a slot, handing it directly to the next live waiter"""
+        while lane.waiters:
+            waiter = lane.waiters.popleft()
+            if not waiter.done():
+                # Slot ownership transfers; `active` stays the same
+                waiter.set_result(None)
+                return
+        lane.active -= 1
+
+    def retry_after(self, lane: Lane) -> int:
+        """Rough hint for clients, in whole seconds"""
+        return max(1, int(lane.queue_timeout + 0.999))
+
+    def snapshot(self) -> Dict:
+        return {name: lane.snapshot() for name, lane in self.lanes.items()}
+
+    def _higher_priority_saturated(self, lane: Lane) -> bool:
+        for other in self.lanes.values():
+            if other.priority < lane.priority and other.saturated():
+                return True
+        return False
@@ -0,0 +1,276 @@
+"""
+Asynchronous prediction audit log.
+
+Request handlers enqueue a record before returning a score; a background
+thread writes records in batches to an append-only SQLite table (WAL mode).
+The queue is bounded: when it is full, `record` awaits space for at most
+`put_timeout` seconds without blocking the event loop, then raises
+AuditUnavailable so the caller refuses the request (503) instead of
+returning a score that was never audited. Records lost after they were
+accepted (write errors, writer not draining at shutdown) are counted as
+`dropped` and mark the log unhealthy.
+
+Read the log back with:
+    python audit_log.py --limit 20
+    python audit_log.py --since 2026-01-01 --risk-level "High Risk" --format csv
+"""
+
+import argparse
+import asyncio
+import atexit
+import csv
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prediction_audit (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    endpoint TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    source TEXT NOT NULL,
+    risk_percentage REAL NOT NULL,
+    risk_level TEXT NOT NULL,
+    inputs TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_prediction_audit_ts ON prediction_audit (ts);
+CREATE TRIGGER IF NOT EXISTS prediction_audit_no_update
+BEFORE UPDATE ON prediction_audit
+BEGIN SELECT RAISE(ABORT, 'prediction_audit is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS prediction_audit_no_delete
+BEFORE DELETE ON prediction_audit
+BEGIN SELECT RAISE(ABORT, 'prediction_audit is append-only'); END;
+"""
+
+INSERT = """
+INSERT INTO prediction_audit
+    (ts, endpoint, model_version, source, risk_percentage, risk_level, inputs)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_STOP = object()
+
+# How often a blocked `record` re-checks the queue for space
+PUT_POLL_SECONDS = 0.005
+
+
+class AuditUnavailable(Exception):
+    """Raised when a record cannot be queued; the score must not be returned"""
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class AuditLog:
+    """Bounded queue in front of a batching SQLite writer thread"""
+
+    def __init__(self, path: str, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0, put_timeout: float = 0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.written = 0
+        # Accepted but never written: a compliance gap, reported as unhealthy
+        self.dropped = 0
+        # Refused with backpressure; the caller did not return a score
+        self.rejected = 0
+        self.batches = 0
+        self.errors = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Create the schema up front so configuration errors surface at startup
+        connect(path).close()
+
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    async def record(self, endpoint: str, model_version: str, source: str,
+                     risk_percentage: float, risk_level: str, inputs: Dict):
+        """
+        Enqueue one prediction, waiting up to `put_timeout` for queue space.
+
+        Yields to the event loop while waiting. Raises AuditUnavailable if
+        the log is closed, the writer has died or the queue stays full.
+        """
+        if self._closed or not self._thread.is_alive():
+            self.rejected += 1
+            raise AuditUnavailable("Audit log is not accepting records")
+        row = (time.time(), endpoint, model_version, source,
+               float(risk_percentage), risk_level, json.dumps(inputs, sort_keys=True))
+        deadline = time.monotonic() + self.put_timeout
+        while True:
+            try:
+                self._queue.put_nowait(row)
+                return
+            except queue.Full:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(PUT_POLL_SECONDS, remaining))
+        self.rejected += 1
+        if self.rejected == 1 or self.rejected % 1000 == 0:
+            print(f"[AUDIT] Queue full, {self.rejected} requests refused so far")
+        raise AuditUnavailable("Audit queue is full")
+
+    def retry_after(self) -> int:
+        """Hint for refused clients: roughly one flush interval"""
+        return max(1, int(self.flush_interval + 0.999))
+
+    def healthy(self) -> bool:
+        return self._thread.is_alive() and self.dropped == 0
+
+    def close(self, timeout: float = 10.0):
+        """Flush everything queued and stop the writer"""
+        if self._closed:
+            return
+        self._closed = True
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            self.dropped += self._queue.qsize()
+            print(f"[AUDIT] Writer not draining, {self._queue.qsize()} queued records not flushed")
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "errors": self.errors,
+            "healthy": self.healthy(),
+        }
+
+    def _run(self):
+        conn = connect(self.path)
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch: List = []
+            if first is _STOP:
+                stopping = True
+            else:
+                batch.append(first)
+            # Drain whatever else is waiting, up to one batch
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    continue
+                batch.append(item)
+            if stopping:
+                # Flush the remainder in full batches before exiting
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        batch.append(item)
+            self._write(conn, batch)
+        conn.close()
+
+    def _write(self, conn: sqlite3.Connection, batch: List):
+        if not batch:
+            return
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            try:
+                with conn:
+                    conn.executemany(INSERT, chunk)
+                self.written += len(chunk)
+                self.batches += 1
+            except sqlite3.Error as e:
+                self.errors += 1
+                self.dropped += len(chunk)
+                print(f"[AUDIT] Write failed, {len(chunk)} records lost: {e}")
+
+
+def query(path: str, since: Optional[str] = None, until: Optional[str] = None,
+          risk_level: Optional[str] = None, model_version: Optional[str] = None,
+          limit: int = 100) -> List[Dict]:
+    """Read audit records back, newest first"""
+    clauses, params = [], []
+    if since:
+        clauses.append("ts >= ?")
+        params.append(datetime.fromisoformat(since).timestamp())
+    if until:
+        clauses.append("ts < ?")
+        params.append(datetime.fromisoformat(until).timestamp())
+    if risk_level:
+        clauses.append("risk_level = ?")
+        params.append(risk_level)
+    if model_version:
+        clauses.append("model_version = ?")
+        params.append(model_version)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute(
+            f"SELECT * FROM prediction_audit {where} ORDER BY id DESC LIMIT ?",
+            params + [limit]
+        ).fetchall()
+    finally:
+        conn.close()
+
+    records = []
+    for row in rows:
+        record = dict(row)
+        record["time"] = datetime.fromtimestamp(record["ts"]).isoformat(timespec="seconds")
+        record["inputs"] = json.loads(record["inputs"])
+        records.append(record)
+    return records
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Query the prediction audit log")
+    parser.add_argument('--db', default=os.getenv("AUDIT_DB_PATH", os.path.join(base_dir, 'audit', 'predictions.db')))
+    parser.add_argument('--since', help="ISO date/time, inclusive")
+    parser.add_argument('--until', help="ISO date/time, exclusive")
+    parser.add_argument('--risk-level')
+    parser.add_argument('--model-version')
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+    args = parser.parse_args()
+
+    results = query(args.db, args.since, args.until, args.risk_level, args.model_version, args.limit)
+    if args.format == 'csv':
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["id", "time", "endpoint", "model_version", "source",
+                         "risk_percentage", "risk_level", "inputs"])
+        for r in results:
+            writer.writerow([r["id"], r["time"], r["endpoint"], r["model_version"], r["source"],
+                             r["risk_percentage"], r["risk_level"], json.dumps(r["inputs"], sort_keys=True)])
+    else:
+        for r in results:
+            print(json.dumps(r))
@@ -1,16 +1,31 @@
-from fastapi import FastAPI, Request, Response, HTTPException
+from fastapi import FastAPI, Request, Response, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 import joblib
 import json
 import pandas as pd
 import numpy as np
 import os
+import hmac
 from typing import List, Dict, Optional
 import anthropic
 import uvicorn
 import re
 
+from chat_sessions import ChatSessionStore, estimate_tokens
+from circuit_breaker import CircuitBreaker
+from admission import AdmissionController, Lane
+from plan_responses import PLAN_BUILDERS, PRECOMPUTED_SEXES, PrecomputedPlans
+from cascade import MIN_SPEEDUP, CascadeModel, file_sha256
+from feature_schema import load_schema
+from explanations import load_index
+from audit_log import AuditLog, AuditUnavailable
+from debug_tools import MAX_PROFILE_SECONDS, ProfilerBusy, SamplingProfiler, memory_report
+from drift_monitor import DriftMonitor, baseline_from_dataframe, load_baseline
+
 # Initialize FastAPI
 app = FastAPI(title="Heart Disease Prediction API")
 
@@ -23,6 +38,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses; precompressed plan bodies already carry a
+# Content-Encoding and are passed through untouched
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=6)
+
 # Add OPTIONS method handler for preflight requests
 @app.options("/{rest_of_path:path}")
 async def preflight_handler(request: Request, rest_of_path: str) -> Response:
@@ -32,6 +51,54 @@ async def preflight_handler(request: Request, rest_of_path: str) -> Response:
     response.headers["Access-Control-Allow-Headers"] = "*"
     return response
 
+# Admission control: ML scoring is high priority, LLM endpoints are shed
+# (served their fallback text) first when the server is under pressure
+admission = AdmissionController([
+    Lane("predict", ["/predict", "/analyze"],
+         max_concurrent=int(os.getenv("PREDICT_MAX_CONCURRENT", "32")),
+         max_queue=int(os.getenv("PREDICT_MAX_QUEUE", "128")),
+         queue_timeout=float(os.getenv("PREDICT_QUEUE_TIMEOUT", "2")),
+         priority=0),
+    Lane("explain", ["/explain"],
+         max_concurrent=int(os.getenv("EXPLAIN_MAX_CONCURRENT", "4")),
+         max_queue=int(os.getenv("EXPLAIN_MAX_QUEUE", "16")),
+         queue_timeout=float(os.getenv("EXPLAIN_QUEUE_TIMEOUT", "5")),
+         priority=1),
+    Lane("chat", ["/chat"],
+         max_concurrent=int(os.getenv("CHAT_MAX_CONCURRENT", "8")),
+         max_queue=int(os.getenv("CHAT_MAX_QUEUE", "16")),
+         queue_timeout=float(os.getenv("CHAT_QUEUE_TIMEOUT", "5")),
+         priority=1, degrade=True),
+    Lane("plan", ["/plan"],
+         max_concurrent=int(os.getenv("PLAN_MAX_CONCURRENT", "4")),
+         max_queue=int(os.getenv("PLAN_MAX_QUEUE", "8")),
+         queue_timeout=float(os.getenv("PLAN_QUEUE_TIMEOUT", "5")),
+         priority=1, degrade=True),
+])
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    lane = admission.lane_for(request.url.path) if request.method == "POST" else None
+    if lane is None:
+        return await call_next(request)
+    
+    if not await admission.admit(lane):
+        if lane.degrade:
+            # Serve the cheap fallback path without taking a slot
+            request.state.degraded = True
+            return await call_next(request)
+        retry_after = admission.retry_after(lane)
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server busy, please retry", "retry_after": retry_after},
+            headers={"Retry-After": str(retry_after)}
+        )
+    
+    try:
+        return await call_next(request)
+    finally:
+        admission.release(lane)
+
 # Add CORS headers to all responses
 @app.middleware("http")
 async def add_cors_header(request: Request, call_next):
@@ -44,6 +111,7 @@ async def add_cors_header(request: Request, call_next):
 # Initialize model and scaler
 model = None
 scaler = None
+feature_schema = None
 
 # Load model and scaler
 try:
@@ -51,6 +119,16 @@ try:
     model_path = os.path.join(base_dir, 'models', 'final_best_model.pkl')
     scaler_path = os.path.join(base_dir, 'models', 'feature_scaler.pkl')
     
+    # A reduced feature schema (from select_features.py) names its own
+    # model and scaler, trained on just the selected columns
+    feature_schema = load_schema(os.path.join(base_dir, 'models'))
+    if feature_schema is not None:
+        model_path = os.path.join(base_dir, 'models', feature_schema.schema['model_file'])
+        scaler_path = os.path.join(base_dir, 'models', feature_schema.schema['scaler_file'])
+        print(f"[OK] Feature schema {feature_schema.version}: {len(feature_schema.features)} features")
+        if feature_schema.missing:
+            print(f"[INFO] Not supplied by the API, using training means: {feature_schema.missing}")
+    
     if not os.path.exists(model_path) or not os.path.exists(scaler_path):
         raise FileNotFoundError("Model or scaler file not found.")
         
@@ -73,6 +151,82 @@ except Exception as e:
     print("[INFO] Will use Claude AI for predictions")
     model = None
     scaler = None
+    feature_schema = None
+
+# Hash of the loaded model file; pins the cascade and the audit log to these bytes
+model_sha256 = None
+if model is not None:
+    try:
+        model_sha256 = file_sha256(model_path)
+    except Exception as e:
+        print(f"[WARNING] Could not hash model file: {e}")
+
+# Model version recorded in the audit log: MODEL_VERSION, or the model file
+# hash (prefixed with the feature schema version when one is in use). The
+# schema version alone does not pin the model bytes.
+MODEL_VERSION = os.getenv("MODEL_VERSION", "")
+if not MODEL_VERSION:
+    parts = []
+    if feature_schema is not None:
+        parts.append(f"schema:{feature_schema.version}")
+    if model_sha256 is not None:
+        parts.append(f"sha256:{model_sha256[:12]}")
+    MODEL_VERSION = "+".join(parts)
+MODEL_VERSION = MODEL_VERSION or "unknown"
+
+# Optional cascade: distilled fast model in front of the full forest
+# (built by train_cascade.py; set INFERENCE_MODE=full to disable)
+cascade_model = None
+if model is not None and os.getenv("INFERENCE_MODE", "cascade") == "cascade":
+    try:
+        fast_model_path = os.path.join(base_dir, 'models', 'cascade_fast_model.pkl')
+        cascade_config_path = os.path.join(base_dir, 'models', 'cascade_config.json')
+        if os.path.exists(fast_model_path) and os.path.exists(cascade_config_path):
+            with open(cascade_config_path) as f:
+                cascade_config = json.load(f)
+            fast_model = joblib.load(fast_model_path)
+            if cascade_config.get("full_model_sha256") is None or cascade_config["full_model_sha256"] != model_sha256:
+                # Distilled from a different forest (or an older config); its
+                # confident answers would not match the loaded model
+                print("[WARNING] Cascade was not distilled from the loaded model, skipping; re-run train_cascade.py")
+            elif cascade_config.get("speedup_single_row", 0.0) <= MIN_SPEEDUP:
+                print("[WARNING] Cascade is not faster than the full model, skipping")
+            elif getattr(fast_model, 'n_features_in_', None) != getattr(model, 'n_features_in_', None):
+                print("[WARNING] Cascade fast model does not match the loaded model's features, skipping")
+            else:
+                cascade_model = CascadeModel(
+                    fast_model, model,
+                    cascade_config["low"], cascade_config["high"]
+                )
+                print(f"[OK] Cascade inference enabled, band [{cascade_model.low:.3f}, {cascade_model.high:.3f}]")
+    except Exception as e:
+        print(f"[WARNING] Could not load cascade model: {e}")
+        cascade_model = None
+
+# Precomputed explanation index (built by build_explanations.py)
+explanation_index = None
+if model is not None:
+    try:
+        explanation_index = load_index(
+            os.path.join(base_dir, 'models'),
+            k=int(os.getenv("EXPLAIN_NEIGHBORS", "5")),
+            max_distance_factor=float(os.getenv("EXPLAIN_MAX_DISTANCE_FACTOR", "3.0"))
+        )
+        if explanation_index is not None:
+            if explanation_index.payload.get("model_sha256") != model_sha256 or model_sha256 is None:
+                # Same width is not enough: a re-exported model with the same
+                # columns would be served the old model's explanations
+                print("[WARNING] Explanation index was not built from the loaded model, skipping; "
+                      "re-run build_explanations.py")
+                explanation_index = None
+            elif explanation_index.points.shape[1] != getattr(model, 'n_features_in_', None):
+                print("[WARNING] Explanation index does not match the loaded model's features, skipping")
+                explanation_index = None
+            else:
+                print(f"[OK] Explanation index loaded: {explanation_index.stats()['profiles']} profiles")
+    except Exception as e:
+        print(f"[WARNING] Could not load explanation index: {e}")
+        explanation_index = None
 
 # Load feature importance
 try:
@@ -83,15 +237,68 @@ except Exception as e:
     print(f"[WARNING] Could not load feature data: {e}")
     feature_importance = None
 
+# Input-drift monitor: baseline from models/drift_baseline.json, or built
+# from the training data loaded above
+drift_baseline = None
+try:
+    drift_baseline = load_baseline(os.path.join(base_dir, 'models', 'drift_baseline.json'))
+    if drift_baseline is None and feature_importance is not None:
+        drift_baseline = baseline_from_dataframe(feature_importance)
+    if drift_baseline:
+        print(f"[OK] Drift baseline loaded for {sorted(drift_baseline)}")
+except Exception as e:
+    print(f"[WARNING] Could not build drift baseline: {e}")
+drift_monitor = DriftMonitor(drift_baseline, int(os.getenv("DRIFT_MIN_OBSERVATIONS", "200")))
+
+# Prediction audit log (batched background writes to SQLite)
+audit_log = AuditLog(
+    os.getenv("AUDIT_DB_PATH", os.path.join(base_dir, 'audit', 'predictions.db')),
+    max_queue=int(os.getenv("AUDIT_MAX_QUEUE", "10000")),
+    batch_size=int(os.getenv("AUDIT_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("AUDIT_FLUSH_SECONDS", "1.0")),
+    put_timeout=float(os.getenv("AUDIT_PUT_TIMEOUT", "0.5")),
+)
+
+@app.exception_handler(AuditUnavailable)
+async def audit_unavailable_handler(request: Request, exc: AuditUnavailable):
+    # Every returned risk score must be audited; push back instead
+    retry_after = audit_log.retry_after()
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Audit log unavailable, please retry", "retry_after": retry_after},
+        headers={"Retry-After": str(retry_after)}
+    )
+
+@app.on_event("shutdown")
+def flush_audit_log():
+    audit_log.close()
+
 # Claude API client
 CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY", "")
+CLAUDE_TIMEOUT = float(os.getenv("CLAUDE_TIMEOUT", "20"))
+# Alternative API host, e.g. benchmarks/fake_claude.py for load tests
+CLAUDE_BASE_URL = os.getenv("CLAUDE_BASE_URL") or None
+
+# Shared breaker for every Claude call; while open, callers serve their
+# fallback responses immediately
+claude_breaker = CircuitBreaker(
+    "claude",
+    failure_rate=float(os.getenv("CLAUDE_BREAKER_FAILURE_RATE", "0.5")),
+    slow_call_seconds=float(os.getenv("CLAUDE_BREAKER_SLOW_SECONDS", "10")),
+    open_seconds=float(os.getenv("CLAUDE_BREAKER_OPEN_SECONDS", "30")),
+)
 
 claude_client = None
 claude_available = False
 
 if CLAUDE_API_KEY:
     try:
-        claude_client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
+        claude_client = anthropic.Anthropic(
+            api_key=CLAUDE_API_KEY,
+            base_url=CLAUDE_BASE_URL,
+            timeout=CLAUDE_TIMEOUT,
+            max_retries=0
+        )
         # Test with a simple, cheap call
         try:
             # Try a minimal test to avoid billing issues
@@ -115,6 +322,39 @@ else:
 
 print(f"[INFO] Claude available: {claude_available}")
 
+# Chat session store (conversation history per session_id)
+chat_sessions = ChatSessionStore(
+    max_sessions=int(os.getenv("CHAT_MAX_SESSIONS", "1000")),
+    ttl_seconds=float(os.getenv("CHAT_SESSION_TTL", "1800")),
+    max_total_bytes=int(os.getenv("CHAT_MAX_BYTES", str(8 * 1024 * 1024))),
+    max_turns=int(os.getenv("CHAT_MAX_TURNS", "20")),
+)
+CHAT_TOKEN_BUDGET = int(os.getenv("CHAT_TOKEN_BUDGET", "3000"))
+
+# Fallback diet/exercise plans, rendered and compressed once at startup
+fallback_plans = PrecomputedPlans()
+print(f"[OK] Precomputed fallback plans: {fallback_plans.stats()}")
+
+# Static system prompt for /chat. Sent as a separate, cache-marked system
+# block so the upstream prompt cache can reuse it across turns.
+CHAT_SYSTEM_PROMPT = """You are Dr. HeartAI, a professional AI health assistant specializing in cardiovascular health.
+
+IMPORTANT RULES:
+1. NEVER show internal system notes or technical details to the user
+2. Always provide personalized, actionable advice when health data is available
+3. If no health data is provided, ask relevant questions to gather information
+4. Structure clear, organized responses with specific recommendations
+5. Focus on heart health but maintain general wellness perspective
+6. Use a supportive, encouraging tone
+7. Never repeat the exact same response consecutively
+8. If analysis is requested but data is limited, explain what insights CAN be provided
+
+RESPONSE FORMAT GUIDELINES:
+- Start with a brief acknowledgment
+- Provide findings in bullet points when appropriate
+- Include specific recommendations
+- End with options for next steps or questions"""
+
 # Request/Response Models
 class HealthData(BaseModel):
     age: int
@@ -132,13 +372,17 @@ class PredictionResponse(BaseModel):
     risk_level: str
     top_risk_factors: List[Dict[str, str]]
     recommendations: List[str]
+    # Where the score came from ("ml", "claude" or "fallback"); not returned to clients
+    source: str = "ml"
 
 class ChatRequest(BaseModel):
     message: str
     user_data: Dict = None
+    session_id: Optional[str] = None
 
 class ChatResponse(BaseModel):
     response: str
+    session_id: Optional[str] = None
 
 # Root endpoint
 @app.get("/")
@@ -153,7 +397,10 @@ def root():
             "analyze": "/analyze",
             "predict": "/predict",
             "chat": "/chat",
-            "plan": "/plan"
+            "plan": "/plan",
+            "plan_precomputed": "/plan/{plan_type}?age=&sex=",
+            "explain": "/explain",
+            "drift": "/drift"
         }
     }
 
@@ -161,22 +408,78 @@ def root():
 @app.get("/health")
 def health_check():
     return {
-        "status": "healthy",
+        # Audit records lost after acceptance are a compliance gap
+        "status": "healthy" if audit_log.healthy() else "unhealthy",
         "model_loaded": model is not None,
         "scaler_loaded": scaler is not None,
-        "claude_available": claude_available
+        "cascade": cascade_model.stats() if cascade_model is not None else None,
+        "explanation_index": explanation_index.stats() if explanation_index is not None else None,
+        "claude_available": claude_available,
+        "claude_circuit": claude_breaker.snapshot(),
+        "admission": admission.snapshot(),
+        "chat_sessions": chat_sessions.stats(),
+        "audit_log": audit_log.stats()
     }
 
+# Input drift report
+@app.get("/drift")
+def drift_report():
+    return drift_monitor.report()
+
+# ========== DEBUG ENDPOINTS ==========
+# Disabled (404) unless DEBUG_TOKEN is set; callers send it as X-Debug-Token
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN", "")
+
+def require_debug_token(request: Request):
+    if not DEBUG_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get("x-debug-token", ""), DEBUG_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+
+@app.get("/debug/profile")
+async def debug_profile(request: Request,
+                        seconds: float = Query(10, ge=0, le=MAX_PROFILE_SECONDS),
+                        interval_ms: float = Query(5, ge=1, le=1000)):
+    """Sample all threads for N seconds; returns collapsed stacks for flamegraphs"""
+    require_debug_token(request)
+    profiler = SamplingProfiler(interval=interval_ms / 1000)
+    try:
+        stacks = await run_in_threadpool(profiler.run, seconds)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(stacks, headers={
+        "Content-Disposition": 'attachment; filename="profile.collapsed"',
+        "X-Profile-Samples": str(profiler.samples)
+    })
+
+@app.get("/debug/memory")
+async def debug_memory(request: Request,
+                       seconds: float = Query(5, ge=0, le=MAX_PROFILE_SECONDS),
+                       top: int = Query(25, ge=1, le=500)):
+    """tracemalloc top allocators plus model and process memory"""
+    require_debug_token(request)
+    models = {
+        "model": model,
+        "scaler": scaler,
+        "cascade_fast_model": cascade_model.fast_model if cascade_model is not None else None,
+        "explanation_index": explanation_index.payload if explanation_index is not None else None,
+    }
+    try:
+        return await run_in_threadpool(memory_report, seconds, top, models)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 # Claude AI prediction fallback
 async def predict_with_claude(data: HealthData) -> PredictionResponse:
     """Use Claude AI for prediction when ML model unavailable"""
-    if not claude_available:
+    if not claude_available or not claude_breaker.allow_request():
         # Return default prediction if Claude not available
         return PredictionResponse(
             risk_percentage=25.0,
             risk_level="Low Risk",
             top_risk_factors=[{"factor": "No major risks identified", "impact": "Low"}],
-            recommendations=["Maintain healthy lifestyle", "Regular exercise", "Balanced diet"]
+            recommendations=["Maintain healthy lifestyle", "Regular exercise", "Balanced diet"],
+            source="fallback"
         )
     
     try:
@@ -194,7 +497,9 @@ Diabetes: {data.diabetes}
 
 Return JSON with risk_percentage, risk_level, top_risk_factors, recommendations"""
 
-        message = claude_client.messages.create(
+        message = await run_in_threadpool(
+            claude_breaker.call,
+            claude_client.messages.create,
             model="claude-3-haiku-20240307",
             max_tokens=500,
             messages=[{"role": "user", "content": prompt}]
@@ -205,13 +510,15 @@ Return JSON with risk_percentage, risk_level, top_risk_factors, recommendations"
         
         if json_match:
             result = json.loads(json_match.group())
+            result["source"] = "claude"
             return PredictionResponse(**result)
         else:
             return PredictionResponse(
                 risk_percentage=25.0,
                 risk_level="Low Risk",
                 top_risk_factors=[{"factor": "No major risks identified", "impact": "Low"}],
-                recommendations=["Maintain healthy lifestyle", "Regular exercise", "Balanced diet"]
+                recommendations=["Maintain healthy lifestyle", "Regular exercise", "Balanced diet"],
+                source="fallback"
             )
             
     except Exception as e:
@@ -220,51 +527,71 @@ Return JSON with risk_percentage, risk_level, top_risk_factors, recommendations"
             risk_percentage=25.0,
             risk_level="Low Risk",
             top_risk_factors=[{"factor": "No major risks identified", "impact": "Low"}],
-            recommendations=["Maintain healthy lifestyle", "Regular exercise", "Balanced diet"]
+            recommendations=["Maintain healthy lifestyle", "Regular exercise", "Balanced diet"],
+            source="fallback"
         )
 
+def encode_features(data: HealthData) -> np.ndarray:
+    """Scaled model input row for a request"""
+    if feature_schema is not None:
+        # Encode and scale only the columns the model was trained on
+        return scaler.transform(feature_schema.encode(data))[0]
+    
+    # Prepare input data
+    input_dict = {
+        'Age': data.age,
+        'Sex': 1 if data.sex.lower() == 'male' else 0,
+        'BMI': data.bmi,
+        'Smoking': 1 if data.smoking.lower() == 'yes' else 0,
+        'PhysicalActivity': 1 if data.physical_activity.lower() == 'yes' else 0,
+        'AlcoholDrinking': 1 if data.alcohol.lower() == 'yes' else 0,
+        'SleepHours': data.sleep_hours,
+        'Diabetic': 1 if data.diabetes.lower() == 'yes' else 0,
+    }
+    
+    # Create feature vector
+    feature_vector = np.zeros(277)
+    feature_mapping = {
+        'Age': 0, 'Sex': 1, 'BMI': 2, 'Smoking': 3,
+        'PhysicalActivity': 4, 'AlcoholDrinking': 5,
+        'SleepHours': 6, 'Diabetic': 7
+    }
+    
+    for feature, value in input_dict.items():
+        if feature in feature_mapping:
+            idx = feature_mapping[feature]
+            feature_vector[idx] = value
+    
+    # Apply scaling
+    if scaler is not None:
+        try:
+            feature_vector_scaled = scaler.transform([feature_vector])
+            feature_vector = feature_vector_scaled[0]
+        except Exception:
+            pass
+    
+    return feature_vector
+
 # Prediction function (used by /analyze)
+def score_row(data: HealthData):
+    """Class probabilities for one request (CPU-bound; call off the event loop)"""
+    feature_vector = encode_features(data)
+    # Cascade answers confident rows itself
+    inference_model = cascade_model if cascade_model is not None else model
+    return inference_model.predict_proba([feature_vector])[0]
+
 async def predict(data: HealthData) -> PredictionResponse:
     """Core prediction logic"""
     
+    drift_monitor.update(data.model_dump())
+    
     # If model exists, use ML model
     if model is not None and scaler is not None:
         try:
-            # Prepare input data
-            input_dict = {
-                'Age': data.age,
-                'Sex': 1 if data.sex.lower() == 'male' else 0,
-                'BMI': data.bmi,
-                'Smoking': 1 if data.smoking.lower() == 'yes' else 0,
-                'PhysicalActivity': 1 if data.physical_activity.lower() == 'yes' else 0,
-                'AlcoholDrinking': 1 if data.alcohol.lower() == 'yes' else 0,
-                'SleepHours': data.sleep_hours,
-                'Diabetic': 1 if data.diabetes.lower() == 'yes' else 0,
-            }
-            
-            # Create feature vector
-            feature_vector = np.zeros(277)
-            feature_mapping = {
-                'Age': 0, 'Sex': 1, 'BMI': 2, 'Smoking': 3,
-                'PhysicalActivity': 4, 'AlcoholDrinking': 5,
-                'SleepHours': 6, 'Diabetic': 7
-            }
-            
-            for feature, value in input_dict.items():
-                if feature in feature_mapping:
-                    idx = feature_mapping[feature]
-                    feature_vector[idx] = value
-            
-            # Apply scaling
-            if scaler is not None:
-                try:
-                    feature_vector_scaled = scaler.transform([feature_vector])
-                    feature_vector = feature_vector_scaled[0]
-                except Exception:
-                    pass
-            
-            # Predict using ML model
-            probability = model.predict_proba([feature_vector])[0]
+            # Scoring runs on the threadpool so the predict lane's
+            # PREDICT_MAX_CONCURRENT bounds real parallelism and a slow
+            # forest never stalls the event loop for other requests
+            probability = await run_in_threadpool(score_row, data)
             
             if len(probability) > 1:
                 risk_percentage = float(probability[1] * 100)
@@ -358,6 +685,17 @@ async def predict(data: HealthData) -> PredictionResponse:
         recommendations=recommendations[:5]
     )
 
+async def audit_prediction(endpoint: str, data: HealthData, result: PredictionResponse):
+    """Queue an audit record for a risk score; raises AuditUnavailable under backpressure"""
+    if result.source == "ml":
+        version = f"{MODEL_VERSION}+cascade" if cascade_model is not None else MODEL_VERSION
+    elif result.source == "claude":
+        version = "claude-3-haiku-20240307"
+    else:
+        version = "static-fallback"
+    await audit_log.record(endpoint, version, result.source, result.risk_percentage,
+                           result.risk_level, data.model_dump())
+
 # /analyze endpoint
 @app.post("/analyze")
 async def analyze_health(request: Request):
@@ -387,6 +725,7 @@ async def analyze_health(request: Request):
         )
         
         result = await predict(data)
+        await audit_prediction("/analyze", data, result)
         
         return {
             "risk_percentage": result.risk_percentage,
@@ -397,6 +736,8 @@ async def analyze_health(request: Request):
         
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON")
+    except AuditUnavailable:
+        raise
     except Exception as e:
         print(f"[ANALYZE] Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -405,6 +746,7 @@ async def analyze_health(request: Request):
 @app.post("/predict")
 async def predict_direct(data: HealthData):
     result = await predict(data)
+    await audit_prediction("/predict", data, result)
     return {
         "risk_percentage": result.risk_percentage,
         "risk_level": result.risk_level,
@@ -412,20 +754,36 @@ async def predict_direct(data: HealthData):
         "recommendations": result.recommendations
     }
 
+# Explanation endpoint (nearest precomputed LIME explanations)
+@app.post("/explain")
+async def explain(data: HealthData):
+    if explanation_index is None:
+        raise HTTPException(status_code=503, detail="Explanation index not available. Run build_explanations.py")
+    
+    feature_vector = encode_features(data)
+    # Exact LIME fallback is CPU heavy; keep it off the event loop
+    return await run_in_threadpool(explanation_index.explain, feature_vector, model)
+
 # Chat endpoint
 @app.post("/chat")
 async def chat(request: Request):
-    """Chat endpoint - receives message and optional user_data"""
+    """Chat endpoint - receives message, optional user_data and optional session_id"""
+    session_id = None
     try:
         body = await request.json()
         
         message = body.get('message', '').strip().lower()
         user_data = body.get('user_data')
+        # Echoed back unchanged on fallback replies; sessions are only looked
+        # up (or created) on the Claude path, so shed requests cannot evict
+        # live conversations
+        session_id = body.get('session_id')
+        degraded = getattr(request.state, "degraded", False)
         
-        if not claude_available:
+        if not claude_available or degraded or not claude_breaker.allow_request():
             # More contextual fallback responses
             if "analysis" in message or "report" in message or "wrong" in message:
-                return {"response": "I'd love to analyze your health data! For personalized insights, please upload your health profile or share key metrics like blood pressure, cholesterol levels, and activity habits."}
+                return {"response": "I'd love to analyze your health data! For personalized insights, please upload your health profile or share key metrics like blood pressure, cholesterol levels, and activity habits.", "session_id": session_id}
             
             fallback_responses = [
                 "I'm Dr. HeartAI! For personalized advice, please share your health data or ask specific questions.",
@@ -438,26 +796,7 @@ async def chat(request: Request):
             # Choose a response that hasn't been used recently
             import random
             response = random.choice(fallback_responses)
-            return {"response": response}
-        
-        # Use Claude if available
-        system_prompt = """You are Dr. HeartAI, a professional AI health assistant specializing in cardiovascular health.
-
-IMPORTANT RULES:
-1. NEVER show internal system notes or technical details to the user
-2. Always provide personalized, actionable advice when health data is available
-3. If no health data is provided, ask relevant questions to gather information
-4. Structure clear, organized responses with specific recommendations
-5. Focus on heart health but maintain general wellness perspective
-6. Use a supportive, encouraging tone
-7. Never repeat the exact same response consecutively
-8. If analysis is requested but data is limited, explain what insights CAN be provided
-
-RESPONSE FORMAT GUIDELINES:
-- Start with a brief acknowledgment
-- Provide findings in bullet points when appropriate
-- Include specific recommendations
-- End with options for next steps or questions"""
+            return {"response": response, "session_id": session_id}
         
         user_context = ""
         if user_data and isinstance(user_data, dict):
@@ -469,8 +808,8 @@ RESPONSE FORMAT GUIDELINES:
             if "analysis" in message or "report" in message or "wrong" in message:
                 user_context += "\nANALYSIS REQUESTED: Provide detailed findings and actionable recommendations based on the above data. Identify potential areas for improvement."
         
-        # Track conversation context (in a real app, use session or database)
-        # For now, we'll pass recent messages as context
+        # Earlier turns come from the session store; this is only a hint
+        # about the current message
         conversation_context = ""
         
         # Check for repetitive queries
@@ -486,26 +825,38 @@ RESPONSE FORMAT GUIDELINES:
         elif "same" in message_lower or "again" in message_lower or "repeat" in message_lower:
             conversation_context = "User seems to be asking for repeated information. Provide variation or ask for clarification."
         
-        prompt = f"""{system_prompt}
-
-{user_context}
+        prompt = f"""{user_context}
 
 {conversation_context}
 
 USER MESSAGE: {message}
 
-YOUR RESPONSE:"""
+YOUR RESPONSE:""".strip()
+        
+        session = chat_sessions.get_or_create(session_id)
+        session_id = session.session_id
         
-        claude_message = claude_client.messages.create(
+        # History is trimmed to fit the token budget left after the system block
+        messages = chat_sessions.build_messages(
+            session,
+            prompt,
+            CHAT_TOKEN_BUDGET - estimate_tokens(CHAT_SYSTEM_PROMPT)
+        )
+        
+        claude_message = await run_in_threadpool(
+            claude_breaker.call,
+            claude_client.messages.create,
             model="claude-3-haiku-20240307",
             max_tokens=600,
             temperature=0.7,  # Add some variation
-            messages=[
+            system=[
                 {
-                    "role": "user",
-                    "content": prompt
+                    "type": "text",
+                    "text": CHAT_SYSTEM_PROMPT,
+                    "cache_control": {"type": "ephemeral"}
                 }
-            ]
+            ],
+            messages=messages
         )
         
         response_text = claude_message.content[0].text
@@ -533,57 +884,34 @@ YOUR RESPONSE:"""
         if not response_text or response_text.isspace():
             response_text = "I'd be happy to help! Could you tell me more about what you'd like to know about your heart health?"
         
-        return {"response": response_text}
+        # Store only the raw user message; user_data is re-sent each turn
+        chat_sessions.record_turn(session, message, response_text)
+        
+        return {"response": response_text, "session_id": session_id}
         
     except Exception as e:
         print(f"[CHAT] Error: {e}")
         # More helpful error response
-        return {"response": "I'm here to help with your heart health! If you're asking for a health analysis, please share your health metrics. Otherwise, feel free to ask any heart health questions."}
+        return {"response": "I'm here to help with your heart health! If you're asking for a health analysis, please share your health metrics. Otherwise, feel free to ask any heart health questions.", "session_id": session_id}
 
 # ========== PLAN FUNCTIONS ==========
 
-async def get_diet_plan(data: HealthData):
+async def get_diet_plan(data: HealthData, degraded: bool = False):
     """Generate personalized diet plan"""
     print(f"[DIET-PLAN] Generating for age={data.age}, sex={data.sex}")
     
-    if not claude_available:
-        # Simple fallback diet plan
-        simple_plan = f"""Personalized Heart-Healthy Diet Plan for {data.age}-year-old {data.sex}:
-
-DAILY MEAL PLAN:
-• Breakfast: Oatmeal with berries OR Greek yogurt with banana
-• Lunch: Grilled chicken salad OR lentil soup with whole grain bread
-• Dinner: Baked salmon with vegetables OR stir-fried tofu with brown rice
-• Snacks: Apple with almond butter, carrot sticks with hummus
-
-HEART-HEALTHY TIPS:
-1. Eat more fruits and vegetables (5+ servings daily)
-2. Choose whole grains over refined grains
-3. Include healthy fats (avocado, nuts, olive oil)
-4. Limit processed foods and added sugars
-5. Control portion sizes
-6. Stay hydrated with water
-
-FOODS TO FOCUS ON:
-• Fruits, vegetables, whole grains
-• Lean proteins (fish, poultry, beans)
-• Healthy fats (nuts, seeds, olive oil)
-• Low-fat dairy
-
-FOODS TO LIMIT:
-• Processed meats
-• Sugary drinks and snacks
-• High-sodium foods
-• Trans fats (fried foods, baked goods)"""
-        
-        return {"diet_plan": simple_plan}
+    if not claude_available or degraded or not claude_breaker.allow_request():
+        # Precomputed fallback diet plan
+        return {"diet_plan": fallback_plans.text("diet", data.age, data.sex), "precomputed": True}
     
     try:
         prompt = f"""Create a simple heart-healthy diet plan for:
 Age: {data.age}, Sex: {data.sex}, BMI: {data.bmi}
 Focus on practical meal ideas."""
         
-        message = claude_client.messages.create(
+        message = await run_in_threadpool(
+            claude_breaker.call,
+            claude_client.messages.create,
             model="claude-3-haiku-20240307",
             max_tokens=600,
             messages=[{"role": "user", "content": prompt}]
@@ -594,50 +922,22 @@ Focus on practical meal ideas."""
         print(f"[DIET-PLAN] Error: {e}")
         return {"diet_plan": "Basic heart-healthy diet: Focus on fruits, vegetables, whole grains, and lean proteins. Limit processed foods and added sugars."}
 
-async def get_exercise_plan(data: HealthData):
+async def get_exercise_plan(data: HealthData, degraded: bool = False):
     """Generate personalized exercise plan"""
     print(f"[EXERCISE-PLAN] Generating for age={data.age}, activity={data.physical_activity}")
     
-    if not claude_available:
-        # Simple fallback exercise plan
-        simple_plan = f"""Personalized Exercise Plan for {data.age}-year-old {data.sex}:
-
-WEEKLY SCHEDULE:
-• Monday: 30 min brisk walking or cycling
-• Tuesday: Strength training (bodyweight exercises)
-• Wednesday: Rest or gentle stretching
-• Thursday: 30 min swimming or elliptical
-• Friday: Strength training
-• Saturday: 45 min moderate activity (hiking, dancing)
-• Sunday: Active rest (yoga or walking)
-
-EXERCISE GUIDELINES:
-1. Warm up: 5-10 min light cardio
-2. Cool down: 5-10 min stretching
-3. Target heart rate: {(220 - data.age) * 0.6:.0f}-{(220 - data.age) * 0.8:.0f} BPM
-4. Stay hydrated before, during, after
-5. Listen to your body - rest if needed
-
-BEGINNER TIPS:
-• Start with 10-15 min sessions
-• Gradually increase duration and intensity
-• Focus on consistency, not perfection
-• Include rest days for recovery
-
-SAFETY NOTES:
-• Consult doctor before starting new exercise
-• Stop if you feel pain or dizziness
-• Use proper form to prevent injury
-• Wear appropriate footwear"""
-        
-        return {"exercise_plan": simple_plan}
+    if not claude_available or degraded or not claude_breaker.allow_request():
+        # Precomputed fallback exercise plan
+        return {"exercise_plan": fallback_plans.text("exercise", data.age, data.sex), "precomputed": True}
     
     try:
         prompt = f"""Create a simple exercise plan for:
 Age: {data.age}, Current Activity: {data.physical_activity}
 Focus on safe, practical exercises."""
         
-        message = claude_client.messages.create(
+        message = await run_in_threadpool(
+            claude_breaker.call,
+            claude_client.messages.create,
             model="claude-3-haiku-20240307",
             max_tokens=600,
             messages=[{"role": "user", "content": prompt}]
@@ -648,6 +948,18 @@ Focus on safe, practical exercises."""
         print(f"[EXERCISE-PLAN] Error: {e}")
         return {"exercise_plan": "Basic exercise: Aim for 150 min moderate exercise per week. Include cardio, strength, and flexibility training."}
 
+# Cacheable precomputed plans; ETag/304 and Cache-Control only make sense on GET
+@app.get("/plan/{plan_type}")
+async def get_precomputed_plan(request: Request, plan_type: str,
+                               age: int = Query(..., ge=1, le=120),
+                               sex: str = Query(...)):
+    """Static fallback plan for an age/sex pair, served from precompressed bytes"""
+    if plan_type not in PLAN_BUILDERS:
+        raise HTTPException(status_code=404, detail="Use 'diet' or 'exercise' for plan_type")
+    if sex not in PRECOMPUTED_SEXES:
+        raise HTTPException(status_code=422, detail=f"sex must be one of {list(PRECOMPUTED_SEXES)}")
+    return fallback_plans.response(request, plan_type, age, sex)
+
 # Plan endpoint
 @app.post("/plan")
 async def get_plan_wrapper(request: Request):
@@ -674,11 +986,18 @@ async def get_plan_wrapper(request: Request):
             diabetes=health_data.get('diabetes', 'No')
         )
         
+        # Set by admission control when the request was shed
+        degraded = getattr(request.state, "degraded", False)
+        
         if plan_type == 'diet':
-            result = await get_diet_plan(data)
+            result = await get_diet_plan(data, degraded)
+            if result.get('precomputed'):
+                return fallback_plans.response(request, 'diet', data.age, data.sex, conditional=False)
             return {"plan": result.get('diet_plan', 'Diet plan available')}
         elif plan_type == 'exercise':
-            result = await get_exercise_plan(data)
+            result = await get_exercise_plan(data, degraded)
+            if result.get('precomputed'):
+                return fallback_plans.response(request, 'exercise', data.age, data.sex, conditional=False)
             return {"plan": result.get('exercise_plan', 'Exercise plan available')}
         else:
             raise HTTPException(status_code=400, detail="Use 'diet' or 'exercise' for plan_type")
@@ -0,0 +1,142 @@
+"""
+Offline job: precompute LIME explanations and build the lookup index.
+
+Samples profiles from the training data, explains each one with LIME on a
+process pool and saves the explanations with a spatial index over the
+scaled features to models/explanation_index.joblib, which backend_api.py
+serves from /explain.
+
+Usage:
+    python build_explanations.py
+    python build_explanations.py --profiles 5000 --workers 8
+"""
+
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from cascade import file_sha256
+from explanations import INDEX_FILE, build_tree, explain_dense, lime_explainer
+from feature_schema import load_schema
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+models_dir = os.path.join(base_dir, 'models')
+
+# Filled in each worker process by _init_worker
+_worker_state = {}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precompute explanations for /explain")
+    parser.add_argument('--data', default=os.path.join(models_dir, 'final_heart_dataset.csv'))
+    parser.add_argument('--target', default='heart_disease')
+    parser.add_argument('--model', default='',
+                        help="Model to explain (default: schema model or final_best_model.pkl)")
+    parser.add_argument('--scaler', default='',
+                        help="Scaler (default: schema scaler or feature_scaler.pkl)")
+    parser.add_argument('--profiles', type=int, default=2000,
+                        help="Number of training profiles to explain")
+    parser.add_argument('--background', type=int, default=1000,
+                        help="Rows kept as LIME background data")
+    parser.add_argument('--num-features', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--out-dir', default=models_dir)
+    return parser.parse_args()
+
+
+def _init_worker(model, background, feature_names, num_features):
+    if hasattr(model, "n_jobs"):
+        model.set_params(n_jobs=1)
+    _worker_state["model"] = model
+    _worker_state["explainer"] = lime_explainer(background, feature_names)
+    _worker_state["n_features"] = len(feature_names)
+    _worker_state["num_features"] = num_features
+
+
+def _explain_chunk(rows):
+    return np.vstack([
+        explain_dense(_worker_state["explainer"], _worker_state["model"], row,
+                      _worker_state["n_features"], _worker_state["num_features"])
+        for row in rows
+    ])
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+
+    schema = load_schema(models_dir)
+    # An explicit --model brings its own scaler and columns, as in train_cascade.py
+    use_schema = schema is not None and not args.model
+    if use_schema:
+        args.model = os.path.join(models_dir, schema.schema['model_file'])
+        args.scaler = os.path.join(models_dir, schema.schema['scaler_file'])
+        print(f"[EXPLAIN] Using feature schema {schema.version}")
+    args.model = args.model or os.path.join(models_dir, 'final_best_model.pkl')
+    args.scaler = args.scaler or os.path.join(models_dir, 'feature_scaler.pkl')
+
+    df = pd.read_csv(args.data)
+    if use_schema:
+        X_df = df[schema.features]
+    else:
+        X_df = df.drop(args.target, axis=1)
+    feature_names = list(X_df.columns)
+
+    model = joblib.load(args.model)
+    scaler = joblib.load(args.scaler)
+    X = scaler.transform(X_df.values)
+
+    rng = np.random.default_rng(42)
+    picked = rng.choice(len(X), size=min(args.profiles, len(X)), replace=False)
+    # Survey rows repeat often once encoded; duplicates would add identical
+    # explanations and drive nn_distance_median (the lookup scale) to 0
+    points = np.unique(X[picked], axis=0)
+    if len(points) < len(picked):
+        print(f"[EXPLAIN] Dropped {len(picked) - len(points)} duplicate profiles")
+    background = X[rng.choice(len(X), size=min(args.background, len(X)), replace=False)]
+
+    chunks = np.array_split(points, max(1, args.workers * 4))
+    print(f"[EXPLAIN] Explaining {len(points)} profiles on {args.workers} workers")
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(model, background, feature_names, args.num_features)) as pool:
+        weights = np.vstack(list(pool.map(_explain_chunk, chunks)))
+
+    tree = build_tree(points)
+    # Distance from each profile to its nearest other profile (k=2 skips itself)
+    nn_distances, _ = tree.query(points, k=min(2, len(points)))
+    nn_median = float(np.median(nn_distances[:, -1]))
+
+    created = datetime.now(timezone.utc)
+    version = f"{created:%Y%m%d%H%M%S}-{hashlib.sha256(points.tobytes()).hexdigest()[:8]}"
+    payload = {
+        "version": version,
+        "created": created.isoformat(timespec="seconds"),
+        "model_file": os.path.basename(args.model),
+        # Pins the index to these model bytes; backend_api.py refuses it otherwise
+        "model_sha256": file_sha256(args.model),
+        "feature_names": feature_names,
+        "points": points.astype(np.float32),
+        "weights": weights.astype(np.float32),
+        "probabilities": model.predict_proba(points)[:, 1].astype(np.float32),
+        "background": background,
+        "num_features": args.num_features,
+        "nn_distance_median": nn_median,
+        "tree": tree,
+    }
+    os.makedirs(args.out_dir, exist_ok=True)
+    joblib.dump(payload, os.path.join(args.out_dir, INDEX_FILE), compress=3)
+
+    print(f"[EXPLAIN] {type(tree).__name__} over {points.shape[1]} features, "
+          f"median nearest-neighbor distance {nn_median:.4f}")
+    print(f"[OK] Saved explanation index {version} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Two-stage (cascade) inference.
+
+A small distilled regressor, trained on the full forest's probabilities,
+scores every row first. Only rows whose fast probability falls inside the
+uncertainty band are escalated to the full model.
+"""
+
+import hashlib
+import threading
+from typing import Dict
+
+import numpy as np
+
+# Single-row speedup over the full model a cascade must beat to be served
+MIN_SPEEDUP = 1.0
+
+
+class CascadeModel:
+    """predict_proba-compatible wrapper around a fast model and the full model"""
+
+    def __init__(self, fast_model, full_model, low: float, high: float):
+        self.fast_model = fast_model
+        self.full_model = full_model
+        self.low = low
+        self.high = high
+        self.classes_ = getattr(full_model, "classes_", np.array([0, 1]))
+        self.n_features_in_ = getattr(full_model, "n_features_in_", None)
+        self.rows = 0
+        self.escalated = 0
+        self._lock = threading.Lock()
+
+    def fast_proba(self, X) -> np.ndarray:
+        """Positive-class probability from the distilled model"""
+        return np.clip(self.fast_model.predict(X), 0.0, 1.0)
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=float)
+        positive = self.fast_proba(X)
+        uncertain = (positive >= self.low) & (positive <= self.high)
+        if uncertain.any():
+            positive[uncertain] = self.full_model.predict_proba(X[uncertain])[:, 1]
+
+        with self._lock:
+            self.rows += len(X)
+            self.escalated += int(uncertain.sum())
+
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[(self.predict_proba(X)[:, 1] >= 0.5).astype(int)]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "band": [self.low, self.high],
+                "rows": self.rows,
+                "escalated": self.escalated,
+                "escalation_rate": round(self.escalated / self.rows, 4) if self.rows else 0.0,
+            }
+
+
+def file_sha256(path: str) -> str:
+    """Hex digest of a model file; pins a cascade to the forest it was distilled from"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fit_band(fast_proba: np.ndarray, full_proba: np.ndarray, max_error: float,
+             outlier_rate: float = 0.005):
+    """
+    Narrowest band [low, high] such that calibration rows outside it have
+    |fast - full| <= max_error, tolerating `outlier_rate` of rows over it.
+
+    Rows are scanned from each end of the fast-probability range inwards;
+    the point where the allowed number of outliers is used up sets that
+    side of the band.
+    """
+    order = np.argsort(fast_proba)
+    fast_sorted = fast_proba[order]
+    bad = np.abs(fast_proba - full_proba)[order] > max_error
+    # Shared between both sides of the band
+    allowed = int(outlier_rate * len(bad)) // 2
+
+    low_hits = np.flatnonzero(np.cumsum(bad) > allowed)
+    if len(low_hits) == 0:
+        # Fast model is good enough everywhere; escalate nothing
+        return 1.0, 0.0
+    high_hits = np.flatnonzero(np.cumsum(bad[::-1]) > allowed)
+
+    low = float(fast_sorted[low_hits[0]])
+    high = float(fast_sorted[len(bad) - 1 - high_hits[0]])
+    return low, high
@@ -0,0 +1,179 @@
+"""
+Chat session store for the /chat endpoint.
+
+Keeps per-conversation history in memory with LRU + TTL eviction and a hard
+cap on the total bytes held, and assembles upstream message lists that fit
+inside a token budget by folding the oldest turns into a short summary.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Rough chars-per-token ratio for English text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Longest snippet of a dropped user message kept in the rolling summary
+SUMMARY_SNIPPET_CHARS = 120
+SUMMARY_MAX_CHARS = 1200
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting (no tokenizer dependency)"""
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class ChatSession:
+    """History of a single conversation"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.turns: List[Tuple[str, str]] = []
+        self.summary = ""
+        self.last_access = time.monotonic()
+
+    def size_bytes(self) -> int:
+        size = len(self.summary)
+        for user_text, assistant_text in self.turns:
+            size += len(user_text) + len(assistant_text)
+        return size
+
+    def fold_oldest_turn(self):
+        """Drop the oldest turn, keeping a one-line trace of it in the summary"""
+        user_text, _ = self.turns.pop(0)
+        snippet = " ".join(user_text.split())[:SUMMARY_SNIPPET_CHARS]
+        self.summary = f"{self.summary}\n- {snippet}".strip()
+        if len(self.summary) > SUMMARY_MAX_CHARS:
+            # Keep the most recent topics only
+            self.summary = self.summary[-SUMMARY_MAX_CHARS:].split("\n", 1)[-1]
+
+
+class ChatSessionStore:
+    """In-memory session store with LRU/TTL eviction and a hard memory cap"""
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 1800,
+                 max_total_bytes: int = 8 * 1024 * 1024, max_turns: int = 20):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_total_bytes = max_total_bytes
+        self.max_turns = max_turns
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_create(self, session_id: Optional[str]) -> ChatSession:
+        """
+        Return the live session for `session_id`, or a new one.
+
+        New sessions always get a server-minted random ID: an unknown
+        client-supplied ID is never adopted, so clients cannot pick an ID
+        that collides with (or guesses) someone else's conversation.
+        """
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = ChatSession(uuid.uuid4().hex)
+                self._sessions[session.session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._evict_oldest()
+            else:
+                self._sessions.move_to_end(session.session_id)
+            session.last_access = time.monotonic()
+            return session
+
+    def record_turn(self, session: ChatSession, user_text: str, assistant_text: str):
+        """Append a completed exchange and enforce per-session and global caps"""
+        with self._lock:
+            before = session.size_bytes()
+            session.turns.append((user_text, assistant_text))
+            while len(session.turns) > self.max_turns:
+                session.fold_oldest_turn()
+            session.last_access = time.monotonic()
+
+            if session.session_id in self._sessions:
+                self._total_bytes += session.size_bytes() - before
+                self._sessions.move_to_end(session.session_id)
+
+            # Hard cap: evict least recently used sessions first, then trim
+            # the current one if it alone is over budget
+            while self._total_bytes > self.max_total_bytes and len(self._sessions) > 1:
+                self._evict_oldest()
+            while self._total_bytes > self.max_total_bytes and session.turns:
+                before = session.size_bytes()
+                session.fold_oldest_turn()
+                self._total_bytes += session.size_bytes() - before
+
+    def build_messages(self, session: ChatSession, user_content: str,
+                       token_budget: int) -> List[Dict]:
+        """
+        Build the upstream `messages` list for the next turn.
+
+        The newest turns are kept verbatim while they fit in `token_budget`;
+        anything older is represented by the session summary, which may use
+        up to a quarter of the budget.
+        """
+        with self._lock:
+            remaining = token_budget - estimate_tokens(user_content)
+            summary_reserve = token_budget // 4 if (session.turns or session.summary) else 0
+            remaining -= summary_reserve
+            summary_lines = session.summary.split("\n") if session.summary else []
+            kept: List[Tuple[str, str]] = []
+            for index in range(len(session.turns) - 1, -1, -1):
+                user_text, assistant_text = session.turns[index]
+                cost = estimate_tokens(user_text) + estimate_tokens(assistant_text)
+                if cost > remaining:
+                    for dropped, _ in session.turns[:index + 1]:
+                        summary_lines.append("- " + " ".join(dropped.split())[:SUMMARY_SNIPPET_CHARS])
+                    break
+                kept.append((user_text, assistant_text))
+                remaining -= cost
+            kept.reverse()
+
+        if summary_lines:
+            # Keep the most recent topics that fit in the reserved budget
+            header = "EARLIER IN THIS CONVERSATION THE USER ASKED ABOUT:"
+            available = summary_reserve + max(remaining, 0) - estimate_tokens(header)
+            selected: List[str] = []
+            for line in reversed(summary_lines):
+                available -= estimate_tokens(line)
+                if available < 0:
+                    break
+                selected.append(line)
+            if selected:
+                summary_text = "\n".join([header] + selected[::-1])
+                user_content = f"{summary_text}\n\n{user_content}"
+
+        messages: List[Dict] = []
+        for user_text, assistant_text in kept:
+            messages.append({"role": "user", "content": user_text})
+            messages.append({"role": "assistant", "content": assistant_text})
+        messages.append({"role": "user", "content": user_content})
+        return messages
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._expire()
+            return {
+                "sessions": len(self._sessions),
+                "total_bytes": self._total_bytes,
+                "max_sessions": self.max_sessions,
+                "max_total_bytes": self.max_total_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_access >= cutoff:
+                break
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        _, session = self._sessions.popitem(last=False)
+        self._total_bytes -= session.size_bytes()
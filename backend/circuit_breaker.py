@@ -0,0 +1,148 @@
+"""
+Circuit breaker for upstream Claude calls.
+
+Shared by backend_api.py and backend_server.py. While the breaker is open,
+callers skip the upstream call and serve their fallback response straight
+away instead of waiting for the request to fail.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker with error-rate and latency trips.
+
+    Outcomes of the last `window_size` calls are kept. Once at least
+    `min_calls` are recorded, the breaker opens when the share of failed or
+    slow calls (slower than `slow_call_seconds`) reaches `failure_rate`.
+    After `open_seconds` a single probe call is let through (half-open);
+    its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name: str, window_size: int = 20, min_calls: int = 5,
+                 failure_rate: float = 0.5, slow_call_seconds: float = 10.0,
+                 open_seconds: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._outcomes = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+        self._times_opened = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if the caller may go upstream now"""
+        with self._lock:
+            now = self._clock()
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+                self._probe_started_at = None
+            if self._state == HALF_OPEN:
+                # One probe at a time; a probe that never reported back is
+                # considered lost after another open interval
+                if self._probe_started_at is None or now - self._probe_started_at >= self.open_seconds:
+                    self._probe_started_at = now
+                    return True
+            self._rejected += 1
+            return False
+
+    def record_success(self, duration: float):
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            if self._state == OPEN:
+                # Straggler that started before the trip; must not extend
+                # the open interval or pollute the next closed window
+                return
+            if self._state == HALF_OPEN:
+                if slow:
+                    self._trip()
+                else:
+                    self._close()
+                return
+            self._outcomes.append(slow)
+            self._maybe_trip()
+
+    def record_failure(self, duration: float = 0.0):
+        with self._lock:
+            if self._state == OPEN:
+                return
+            if self._state == HALF_OPEN:
+                self._trip()
+                return
+            self._outcomes.append(True)
+            self._maybe_trip()
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Run `func` and record its outcome; the caller checks allow_request() first"""
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure(time.perf_counter() - start)
+            raise
+        self.record_success(time.perf_counter() - start)
+        return result
+
+    def retry_after(self) -> int:
+        """Seconds until the next probe is allowed (0 when closed)"""
+        with self._lock:
+            if self._state == CLOSED:
+                return 0
+            remaining = self.open_seconds - (self._clock() - self._opened_at)
+            return max(1, int(remaining + 0.999))
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            calls = len(self._outcomes)
+            bad = sum(self._outcomes)
+            return {
+                "name": self.name,
+                "state": self._state,
+                "recent_calls": calls,
+                "recent_failure_rate": round(bad / calls, 3) if calls else 0.0,
+                "times_opened": self._times_opened,
+                "rejected_calls": self._rejected,
+            }
+
+    def _maybe_trip(self):
+        calls = len(self._outcomes)
+        if calls >= self.min_calls and sum(self._outcomes) / calls >= self.failure_rate:
+            self._trip()
+
+    def _trip(self):
+        if self._state == OPEN:
+            return
+        self._times_opened += 1
+        print(f"[BREAKER] {self.name} opened")
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._probe_started_at = None
+
+    def _close(self):
+        print(f"[BREAKER] {self.name} closed")
+        self._state = CLOSED
+        self._outcomes.clear()
+        self._probe_started_at = None
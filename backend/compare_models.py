@@ -0,0 +1,376 @@
+"""
+Compare candidate models on accuracy, latency and memory, and pick one to serve.
+
+Trains the notebook's candidates (random forest, the final 800-tree forest,
+gradient boosting and, when installed, XGBoost) on its train/test split,
+plus any already-fitted models passed with --load and the model the
+backend currently serves. For each one it measures:
+
+  - accuracy and ROC AUC on the test split
+  - single-row predict_proba latency (p50/p95), as configured
+  - batch latency and throughput, as configured and pinned to one core
+  - serialized size, load time and resident memory after loading; the
+    last two are measured in a fresh process so earlier candidates do
+    not skew them
+
+Candidates that no other candidate beats on AUC, p95 latency and memory
+together form the Pareto front. Those within --latency-budget-ms and
+--memory-budget-mb are marked as fitting, and the best of them by AUC is
+recommended. --export saves it as a new versioned model file, points
+the feature schema (or final_best_model.pkl) at it and sets aside the
+cascade and explanation index built from the previous model.
+
+Usage:
+    python compare_models.py
+    python compare_models.py --latency-budget-ms 20 --memory-budget-mb 256 --export
+    python compare_models.py --candidates random_forest,xgboost --load old=models/old.pkl
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from cascade import file_sha256
+from debug_tools import model_footprint, process_memory
+from explanations import INDEX_FILE
+from feature_schema import load_schema, save_schema
+from model_configs import MODEL_PARAMS, available_models, build_model
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+models_dir = os.path.join(base_dir, 'models')
+
+REPORT_FILE = 'model_comparison.json'
+
+# Built from the served model; moved aside on export so they are rebuilt
+MODEL_ARTIFACTS = ['cascade_fast_model.pkl', 'cascade_config.json', 'cascade_report.json', INDEX_FILE]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Accuracy/latency/memory comparison of candidate models")
+    parser.add_argument('--data', default=os.path.join(models_dir, 'final_heart_dataset.csv'))
+    parser.add_argument('--target', default='heart_disease')
+    parser.add_argument('--candidates', default=','.join(MODEL_PARAMS),
+                        help="Comma separated candidates to train")
+    parser.add_argument('--load', action='append', default=[], metavar='NAME=PATH',
+                        help="Also compare an already-fitted model (repeatable)")
+    parser.add_argument('--max-estimators', type=int, default=0,
+                        help="Cap n_estimators for quick runs (0 = notebook values)")
+    parser.add_argument('--train-rows', type=int, default=0,
+                        help="Subsample the training split (0 = all rows)")
+    parser.add_argument('--single-rows', type=int, default=200,
+                        help="Single-row predictions timed per candidate")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--batch-repeats', type=int, default=5)
+    parser.add_argument('--latency-budget-ms', type=float, default=50.0,
+                        help="Max single-row p95 latency for a model to be served")
+    parser.add_argument('--memory-budget-mb', type=float, default=512.0,
+                        help="Max resident memory of the loaded model")
+    parser.add_argument('--export', action='store_true',
+                        help="Export the recommended model as a new versioned file for backend_api.py")
+    parser.add_argument('--out-dir', default=models_dir,
+                        help="Where the report and an exported model are written")
+    return parser.parse_args()
+
+
+def percentiles_ms(durations):
+    ms = np.asarray(durations) * 1000.0
+    return round(float(np.percentile(ms, 50)), 4), round(float(np.percentile(ms, 95)), 4)
+
+
+def batch_throughput(model, X, batch_size, repeats):
+    batch = X[:batch_size]
+    model.predict_proba(batch)
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(batch)
+        durations.append(time.perf_counter() - start)
+    p50, _ = percentiles_ms(durations)
+    return p50, round(len(batch) / (p50 / 1000.0), 1)
+
+
+def measure_latency(model, X, single_rows, batch_size, repeats):
+    rows = X[:single_rows]
+    model.predict_proba(rows[:1])
+    durations = []
+    for row in rows:
+        start = time.perf_counter()
+        model.predict_proba(row.reshape(1, -1))
+        durations.append(time.perf_counter() - start)
+    single_p50, single_p95 = percentiles_ms(durations)
+    batch_ms, rows_per_s = batch_throughput(model, X, batch_size, repeats)
+
+    # Per-core throughput: pin multi-threaded models to one thread, then restore
+    n_jobs = model.get_params().get("n_jobs", "absent")
+    if n_jobs != "absent":
+        model.set_params(n_jobs=1)
+    try:
+        _, rows_per_s_core = batch_throughput(model, X, batch_size, repeats)
+    finally:
+        if n_jobs != "absent":
+            model.set_params(n_jobs=n_jobs)
+
+    return {
+        "single_row_p50_ms": single_p50,
+        "single_row_p95_ms": single_p95,
+        "batch_size": int(min(batch_size, len(X))),
+        "batch_p50_ms": batch_ms,
+        "rows_per_s": rows_per_s,
+        "rows_per_s_per_core": rows_per_s_core,
+    }
+
+
+def _load_probe(path, module, row):
+    """Runs in a fresh process: time joblib.load and the RSS it adds"""
+    # Import the model's library first so its own footprint is not counted
+    importlib.import_module(module)
+    before = process_memory()
+    start = time.perf_counter()
+    model = joblib.load(path)
+    load_seconds = time.perf_counter() - start
+    model.predict_proba(row)
+    after = process_memory()
+    key = "rss_bytes" if after["rss_bytes"] is not None else "peak_rss_bytes"
+    if after[key] is None:
+        return load_seconds, None
+    return load_seconds, after[key] - before[key]
+
+
+def measure_footprint(model, row, workdir, name):
+    path = os.path.join(workdir, f"{name}.pkl")
+    joblib.dump(model, path)
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        load_seconds, rss = pool.submit(_load_probe, path, type(model).__module__, row).result()
+    return {
+        "serialized_bytes": os.path.getsize(path),
+        "load_seconds": round(load_seconds, 4),
+        "rss_bytes": rss,
+        "array_bytes": model_footprint(model),
+    }
+
+
+def dominates(a, b):
+    """
+    a is at least as good as b on AUC, p95 latency and memory, and better on one.
+
+    Memory only counts when both were measured; an unknown rss_bytes is
+    not treated as the best possible value.
+    """
+    a_key = [-a["score"], a["single_row_p95_ms"]]
+    b_key = [-b["score"], b["single_row_p95_ms"]]
+    if a["rss_bytes"] is not None and b["rss_bytes"] is not None:
+        a_key.append(a["rss_bytes"])
+        b_key.append(b["rss_bytes"])
+    return all(x <= y for x, y in zip(a_key, b_key)) and a_key != b_key
+
+
+def export_model(model, result, schema, scaler, scaler_path, fitted_scaler, out_dir):
+    """
+    Save the model under a new versioned name in `out_dir` and point the
+    backend's files there at it.
+
+    With a feature schema, the schema is rewritten with the new model file
+    and a new version. Without one, final_best_model.pkl is replaced (the old
+    file is kept as .previous). Either way MODEL_VERSION changes. The
+    cascade and explanation index were built from the old model, so they
+    are moved aside (*.stale) until train_cascade.py and
+    build_explanations.py are re-run.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    created = datetime.now(timezone.utc)
+    stamp = f"{created:%Y%m%d%H%M%S}"
+    versioned = os.path.join(out_dir, f"model_{result['name']}_{stamp}.pkl")
+    joblib.dump(model, versioned)
+    digest = file_sha256(versioned)
+
+    if schema is not None:
+        updated = dict(schema.schema)
+        updated.update({
+            "version": f"{stamp}-{hashlib.sha256(','.join(schema.features).encode()).hexdigest()[:8]}",
+            "previous_version": schema.version,
+            "created": created.isoformat(timespec="seconds"),
+            "model_file": os.path.basename(versioned),
+            "model_sha256": digest,
+            "model_selected_by": f"compare_models.py ({result['name']})",
+            "accuracy": result["accuracy"],
+            "auc": result["auc"],
+        })
+        out_scaler = os.path.join(out_dir, updated['scaler_file'])
+        if not os.path.exists(out_scaler):
+            # Keep the exported schema self-contained outside models/
+            shutil.copy2(scaler_path, out_scaler)
+        save_schema(out_dir, updated)
+        print(f"[OK] Feature schema {updated['version']} now serves {os.path.basename(versioned)}")
+    else:
+        served_model = os.path.join(out_dir, 'final_best_model.pkl')
+        out_scaler = os.path.join(out_dir, 'feature_scaler.pkl')
+        if os.path.exists(served_model):
+            shutil.copy2(served_model, served_model + '.previous')
+        shutil.copy2(versioned, served_model)
+        if fitted_scaler:
+            joblib.dump(scaler, out_scaler)
+        elif not os.path.exists(out_scaler):
+            shutil.copy2(scaler_path, out_scaler)
+        print(f"[OK] Exported {result['name']} to {served_model} (also kept as {os.path.basename(versioned)})")
+
+    for name in MODEL_ARTIFACTS:
+        path = os.path.join(out_dir, name)
+        if os.path.exists(path):
+            os.replace(path, path + '.stale')
+            print(f"[INFO] Moved {name} aside; it was built from the previous model")
+    print("[INFO] Re-run train_cascade.py and build_explanations.py for the new model")
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+
+    # Same columns, scaler and served model file as backend_api.py
+    schema = load_schema(models_dir)
+    if schema is not None:
+        served_model = os.path.join(models_dir, schema.schema['model_file'])
+        scaler_path = os.path.join(models_dir, schema.schema['scaler_file'])
+        print(f"[COMPARE] Using feature schema {schema.version}")
+    else:
+        served_model = os.path.join(models_dir, 'final_best_model.pkl')
+        scaler_path = os.path.join(models_dir, 'feature_scaler.pkl')
+
+    df = pd.read_csv(args.data)
+    X_df = df[schema.features] if schema is not None else df.drop(args.target, axis=1)
+    y = df[args.target].values
+
+    fitted_scaler = not os.path.exists(scaler_path)
+    if fitted_scaler:
+        # As in heart_model_training.ipynb: scale everything, then split
+        scaler = StandardScaler().fit(X_df.values)
+    else:
+        scaler = joblib.load(scaler_path)
+    X = scaler.transform(X_df.values)
+
+    # Same split as heart_model_training.ipynb
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y,
+        test_size=0.2,
+        random_state=42,
+        stratify=y
+    )
+    if args.train_rows and args.train_rows < len(X_train):
+        rng = np.random.default_rng(42)
+        keep = rng.choice(len(X_train), size=args.train_rows, replace=False)
+        X_train, y_train = X_train[keep], y_train[keep]
+
+    installed = available_models()
+    models = {}
+    for name in [c.strip() for c in args.candidates.split(',') if c.strip()]:
+        if name not in installed:
+            hint = " (pip install xgboost)" if name == "xgboost" else ""
+            print(f"[WARNING] Unknown or unavailable candidate '{name}'{hint}, skipping")
+            continue
+        print(f"[COMPARE] Training {name} on {len(X_train)} rows")
+        model = build_model(name, args.max_estimators)
+        t = time.perf_counter()
+        model.fit(X_train, y_train)
+        models[name] = (model, round(time.perf_counter() - t, 2))
+
+    loaded = [item.split('=', 1) for item in args.load]
+    if os.path.exists(served_model):
+        loaded.append(("served", served_model))
+    for name, path in loaded:
+        model = joblib.load(path)
+        if not hasattr(model, 'predict_proba'):
+            print(f"[WARNING] {name} ({path}) is not a classifier, skipping")
+            continue
+        if getattr(model, 'n_features_in_', X.shape[1]) != X.shape[1]:
+            print(f"[WARNING] {name} ({path}) expects {model.n_features_in_} features, not {X.shape[1]}, skipping")
+            continue
+        models[name] = (model, None)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="compare-models-") as workdir:
+        for name, (model, fit_seconds) in models.items():
+            print(f"[COMPARE] Measuring {name}")
+            proba = model.predict_proba(X_test)[:, 1]
+            try:
+                auc = float(roc_auc_score(y_test, proba))
+            except ValueError:
+                auc = None
+            result = {
+                "name": name,
+                "type": type(model).__name__,
+                "trained": fit_seconds is not None,
+                "fit_seconds": fit_seconds,
+                "accuracy": float(accuracy_score(y_test, model.predict(X_test))),
+                "auc": auc,
+            }
+            result.update(measure_latency(model, X_test, args.single_rows, args.batch_size, args.batch_repeats))
+            result.update(measure_footprint(model, X_test[:1], workdir, name))
+            result["score"] = auc if auc is not None else result["accuracy"]
+            results.append(result)
+
+    latency_budget = args.latency_budget_ms
+    memory_budget = args.memory_budget_mb * 1024 * 1024
+    for r in results:
+        r["pareto"] = not any(dominates(other, r) for other in results if other is not r)
+        r["fits_budget"] = (r["single_row_p95_ms"] <= latency_budget
+                            and r["rss_bytes"] is not None and r["rss_bytes"] <= memory_budget)
+    fitting = [r for r in results if r["fits_budget"]]
+    best = max(fitting, key=lambda r: (r["score"], -r["single_row_p95_ms"], -(r["rss_bytes"] or 0)), default=None)
+
+    print("[COMPARE] ========== REPORT ==========")
+    print(f"[COMPARE] Budget: single-row p95 <= {latency_budget:g} ms, memory <= {args.memory_budget_mb:g} MB")
+    print(f"[COMPARE] {'model':<22}{'acc':>8}{'auc':>8}{'p95 ms':>10}{'rows/s':>11}{'rows/s/core':>13}"
+          f"{'size MB':>9}{'rss MB':>9}{'load s':>8}  pareto  fits")
+    for r in sorted(results, key=lambda r: -r["score"]):
+        rss = f"{r['rss_bytes'] / 2**20:.1f}" if r["rss_bytes"] is not None else "n/a"
+        auc = f"{r['auc']:.4f}" if r["auc"] is not None else "n/a"
+        print(f"[COMPARE] {r['name']:<22}{r['accuracy']:>8.4f}{auc:>8}{r['single_row_p95_ms']:>10.2f}"
+              f"{r['rows_per_s']:>11,.0f}{r['rows_per_s_per_core']:>13,.0f}"
+              f"{r['serialized_bytes'] / 2**20:>9.1f}{rss:>9}{r['load_seconds']:>8.2f}"
+              f"  {'yes' if r['pareto'] else '-':<6}  {'yes' if r['fits_budget'] else '-'}")
+
+    created = datetime.now(timezone.utc)
+    report = {
+        "created": created.isoformat(timespec="seconds"),
+        "data": os.path.basename(args.data),
+        "schema_version": schema.version if schema is not None else None,
+        "test_rows": int(len(X_test)),
+        "train_rows": int(len(X_train)),
+        "cpu_count": os.cpu_count(),
+        "budget": {"single_row_p95_ms": latency_budget, "rss_bytes": memory_budget},
+        "recommended": best["name"] if best else None,
+        "candidates": results,
+    }
+    os.makedirs(args.out_dir, exist_ok=True)
+    with open(os.path.join(args.out_dir, REPORT_FILE), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if best is None:
+        print("[WARNING] No candidate fits the latency and memory budget")
+    else:
+        print(f"[COMPARE] Recommended: {best['name']} (auc {best['score']:.4f}, "
+              f"p95 {best['single_row_p95_ms']:.2f} ms)")
+        if args.export and best["name"] == "served":
+            print("[COMPARE] The served model is already the best fit, nothing to export")
+        elif args.export:
+            export_model(models[best["name"]][0], best, schema, scaler, scaler_path, fitted_scaler,
+                         args.out_dir)
+    print(f"[OK] Saved {REPORT_FILE} to {args.out_dir} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+On-demand profiling helpers for the /debug endpoints.
+
+SamplingProfiler walks every thread's stack with sys._current_frames() at a
+fixed interval from a background thread, so the code being profiled is
+never instrumented; output is in collapsed-stack format ("a;b;c 12"),
+ready for flamegraph.pl or speedscope. memory_report() takes a tracemalloc
+snapshot over a short window and sizes the loaded models.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Optional
+
+import numpy as np
+
+MAX_PROFILE_SECONDS = 60
+MAX_STACK_DEPTH = 64
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile or memory trace is already running"""
+
+
+# One profile or trace at a time per worker
+_busy = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Wall-clock stack sampler over all threads except its own"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def run(self, seconds: float) -> str:
+        """Sample for `seconds` and return collapsed stacks"""
+        if not _busy.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running on this worker")
+        try:
+            me = threading.get_ident()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            deadline = time.perf_counter() + min(max(seconds, 0), MAX_PROFILE_SECONDS)
+            while time.perf_counter() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    stack = []
+                    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                        stack.append(_frame_label(frame))
+                        frame = frame.f_back
+                    stack.append(names.get(ident, f"thread-{ident}"))
+                    self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+                time.sleep(self.interval)
+        finally:
+            _busy.release()
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + "\n"
+
+
+def model_footprint(obj) -> Optional[int]:
+    """Approximate bytes held by a fitted model's arrays"""
+    if obj is None:
+        return None
+    seen = set()
+
+    def size(value, depth=0) -> int:
+        if id(value) in seen or depth > 6:
+            return 0
+        seen.add(id(value))
+        if isinstance(value, np.ndarray):
+            if value.dtype == object:
+                # e.g. GradientBoosting.estimators_: nbytes only counts the pointers
+                return value.nbytes + sum(size(v, depth + 1) for v in value.ravel())
+            return value.nbytes
+        tree = getattr(value, "tree_", None)
+        if tree is not None and hasattr(tree, "value"):
+            # sklearn Tree: node arrays live in C; sum the exposed views
+            return sum(getattr(tree, attr).nbytes for attr in (
+                "children_left", "children_right", "feature", "threshold",
+                "value", "impurity", "n_node_samples", "weighted_n_node_samples"))
+        if hasattr(value, "get_arrays"):
+            # sklearn KDTree / BallTree
+            return sum(a.nbytes for a in value.get_arrays() if isinstance(a, np.ndarray))
+        if isinstance(value, (list, tuple)):
+            return sum(size(v, depth + 1) for v in value)
+        if isinstance(value, dict):
+            return sum(size(v, depth + 1) for v in value.values())
+        if hasattr(value, "__dict__"):
+            return sum(size(v, depth + 1) for v in vars(value).values())
+        return sys.getsizeof(value)
+
+    return size(obj)
+
+
+def process_memory() -> Dict:
+    """Current and peak resident set size in bytes (Linux/macOS)"""
+    result = {"rss_bytes": None, "peak_rss_bytes": None}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    result["rss_bytes"] = int(line.split()[1]) * 1024
+                elif line.startswith("VmHWM:"):
+                    result["peak_rss_bytes"] = int(line.split()[1]) * 1024
+    except OSError:
+        try:
+            import resource
+
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss is bytes on macOS, KiB on Linux
+            result["peak_rss_bytes"] = peak if sys.platform == "darwin" else peak * 1024
+        except ImportError:
+            pass
+    return result
+
+
+def memory_report(seconds: float, top: int, models: Dict) -> Dict:
+    """
+    Top allocation sites plus model and process sizes.
+
+    If tracemalloc is already tracing (python -X tracemalloc), the snapshot
+    covers everything since startup. Otherwise tracing is switched on only
+    for `seconds` and the report covers allocations made in that window.
+    """
+    window = min(max(seconds, 0), MAX_PROFILE_SECONDS)
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running on this worker")
+    try:
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            # One frame per trace keeps the overhead low on a live worker
+            tracemalloc.start(1)
+        try:
+            if started_here:
+                time.sleep(window)
+            snapshot = tracemalloc.take_snapshot()
+            traced, peak = tracemalloc.get_traced_memory()
+        finally:
+            # Never leave tracing on: later reports would look like
+            # startup-wide traces and every allocation would pay for it
+            if started_here:
+                tracemalloc.stop()
+    finally:
+        _busy.release()
+
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    allocators = [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:top]
+    ]
+    return {
+        "window_seconds": window if started_here else None,
+        "traced_bytes": traced,
+        "traced_peak_bytes": peak,
+        "top_allocators": allocators,
+        "models": {name: model_footprint(obj) for name, obj in models.items()},
+        "process": process_memory(),
+    }
@@ -0,0 +1,330 @@
+"""
+Streaming input-drift monitor.
+
+Every prediction updates constant-memory statistics per input field:
+Welford mean/variance and a fixed-bin histogram for numeric fields, and
+bounded value counts for categorical ones. The report compares them with
+a baseline built from the training data (final_heart_dataset.csv) using
+PSI and a binned KS statistic. Below `min_observations` values a field
+reports "insufficient_data" instead: with a handful of requests most bins
+are empty and PSI is dominated by the epsilon floor.
+
+Build the baseline file ahead of time with:
+    python drift_monitor.py --data models/final_heart_dataset.csv
+or benchmark the per-update cost with:
+    python drift_monitor.py --bench
+"""
+
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+# Monitored request fields: kind and the dataset columns they may map to
+MONITORED_FIELDS = {
+    "age": ("numeric", ["age", "Age"]),
+    "bmi": ("numeric", ["bmi", "BMI"]),
+    "sleep_hours": ("numeric", ["sleep_hours", "SleepHours"]),
+    "sex": ("categorical", ["sex", "Sex"]),
+    "smoking": ("categorical", ["smoking", "Smoking", "smoker"]),
+    "physical_activity": ("categorical", ["physical_activity", "PhysicalActivity", "PhysicalActivities"]),
+    "alcohol": ("categorical", ["alcohol", "AlcoholDrinking", "AlcoholDrinkers"]),
+    "general_health": ("categorical", ["general_health", "GeneralHealth"]),
+    "diabetes": ("categorical", ["diabetes", "Diabetic", "HadDiabetes"]),
+}
+
+NUM_BINS = 10
+MAX_CATEGORIES = 32
+OTHER = "__other__"
+PSI_EPSILON = 1e-4
+# PSI/KS need enough values to fill the bins before they mean anything
+MIN_OBSERVATIONS = 200
+
+# Same 0/1 encoding predict() uses for the model
+CATEGORY_ALIASES = {
+    "yes": "1", "true": "1", "1": "1", "1.0": "1", "male": "1",
+    "no": "0", "false": "0", "0": "0", "0.0": "0", "female": "0",
+}
+
+
+def normalize_category(value) -> str:
+    text = str(value).strip().lower()
+    return CATEGORY_ALIASES.get(text, text)
+
+
+def psi_status(psi: Optional[float]) -> str:
+    if psi is None:
+        return "no_baseline"
+    if psi < 0.1:
+        return "stable"
+    if psi < 0.25:
+        return "moderate_drift"
+    return "significant_drift"
+
+
+class NumericStats:
+    """Welford moments plus a histogram over fixed bin edges"""
+
+    def __init__(self, edges: List[float]):
+        self.edges = edges
+        self.counts = [0] * (len(edges) + 1)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        self.counts[bisect_right(self.edges, x)] += 1
+
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+
+class CategoricalStats:
+    """Value counts capped at MAX_CATEGORIES distinct values (OTHER included)"""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self.n = 0
+
+    def update(self, value: str):
+        self.n += 1
+        if value not in self.counts and len(self.counts) - (OTHER in self.counts) >= MAX_CATEGORIES - 1:
+            value = OTHER
+        self.counts[value] = self.counts.get(value, 0) + 1
+
+
+class DriftMonitor:
+    """Online per-field statistics compared against a training baseline"""
+
+    def __init__(self, baseline: Optional[Dict] = None, min_observations: int = MIN_OBSERVATIONS):
+        self.baseline = baseline or {}
+        self.min_observations = min_observations
+        self.numeric: Dict[str, NumericStats] = {}
+        self.categorical: Dict[str, CategoricalStats] = {}
+        for field, (kind, _) in MONITORED_FIELDS.items():
+            if kind == "numeric":
+                edges = self.baseline.get(field, {}).get("edges", [])
+                self.numeric[field] = NumericStats(edges)
+            else:
+                self.categorical[field] = CategoricalStats()
+        self.updates = 0
+        self.update_seconds = 0.0
+        self.max_update_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, record: Dict):
+        """Record one request's inputs (O(1) per field)"""
+        start = time.perf_counter()
+        with self._lock:
+            for field, stats in self.numeric.items():
+                value = record.get(field)
+                if value is not None:
+                    stats.update(float(value))
+            for field, stats in self.categorical.items():
+                value = record.get(field)
+                if value is not None:
+                    stats.update(normalize_category(value))
+            elapsed = time.perf_counter() - start
+            self.updates += 1
+            self.update_seconds += elapsed
+            if elapsed > self.max_update_seconds:
+                self.max_update_seconds = elapsed
+
+    def report(self) -> Dict:
+        with self._lock:
+            fields = {}
+            for field, stats in self.numeric.items():
+                fields[field] = self._numeric_report(field, stats)
+            for field, stats in self.categorical.items():
+                fields[field] = self._categorical_report(field, stats)
+            worst = max((f["psi"] for f in fields.values() if f["psi"] is not None), default=None)
+            if self.baseline and worst is None:
+                overall = "insufficient_data"
+            else:
+                overall = psi_status(worst)
+            return {
+                "observations": self.updates,
+                "min_observations": self.min_observations,
+                "baseline_loaded": bool(self.baseline),
+                "overall_status": overall,
+                "max_psi": worst,
+                "update_us_mean": round(self.update_seconds / self.updates * 1e6, 2) if self.updates else 0.0,
+                "update_us_max": round(self.max_update_seconds * 1e6, 2),
+                "fields": fields,
+            }
+
+    def _numeric_report(self, field: str, stats: NumericStats) -> Dict:
+        result = {
+            "kind": "numeric",
+            "count": stats.n,
+            "mean": round(stats.mean, 4) if stats.n else None,
+            "std": round(stats.std(), 4) if stats.n else None,
+            "min": stats.min if stats.n else None,
+            "max": stats.max if stats.n else None,
+            "psi": None,
+            "ks": None,
+        }
+        base = self.baseline.get(field)
+        if base:
+            result["baseline_mean"] = base["mean"]
+            result["baseline_std"] = base["std"]
+        if base and stats.n >= self.min_observations:
+            actual = [c / stats.n for c in stats.counts]
+            result["psi"] = round(population_stability_index(base["proportions"], actual), 4)
+            result["ks"] = round(binned_ks(base["proportions"], actual), 4)
+        result["status"] = self._status(base, stats.n, result["psi"])
+        return result
+
+    def _categorical_report(self, field: str, stats: CategoricalStats) -> Dict:
+        result = {
+            "kind": "categorical",
+            "count": stats.n,
+            "counts": dict(stats.counts),
+            "psi": None,
+        }
+        base = self.baseline.get(field)
+        if base and stats.n >= self.min_observations:
+            categories = sorted(set(base["proportions"]) | set(stats.counts))
+            expected = [base["proportions"].get(c, 0.0) for c in categories]
+            actual = [stats.counts.get(c, 0) / stats.n for c in categories]
+            result["psi"] = round(population_stability_index(expected, actual), 4)
+            unseen = [c for c in stats.counts if c not in base["proportions"]]
+            if unseen:
+                result["unseen_values"] = unseen
+        result["status"] = self._status(base, stats.n, result["psi"])
+        return result
+
+    def _status(self, base: Optional[Dict], count: int, psi: Optional[float]) -> str:
+        if base and count < self.min_observations:
+            return "insufficient_data"
+        return psi_status(psi)
+
+
+def population_stability_index(expected: List[float], actual: List[float]) -> float:
+    psi = 0.0
+    for e, a in zip(expected, actual):
+        e = max(e, PSI_EPSILON)
+        a = max(a, PSI_EPSILON)
+        psi += (a - e) * math.log(a / e)
+    return psi
+
+
+def binned_ks(expected: List[float], actual: List[float]) -> float:
+    """KS statistic over the shared bins (max gap between the two CDFs)"""
+    gap = 0.0
+    cdf_e = cdf_a = 0.0
+    for e, a in zip(expected, actual):
+        cdf_e += e
+        cdf_a += a
+        gap = max(gap, abs(cdf_e - cdf_a))
+    return gap
+
+
+def baseline_from_dataframe(df) -> Dict:
+    """Build the drift baseline from the training dataframe"""
+    import numpy as np
+
+    baseline = {}
+    for field, (kind, candidates) in MONITORED_FIELDS.items():
+        column = next((c for c in candidates if c in df.columns), None)
+        if column is None:
+            continue
+        values = df[column].dropna()
+        if values.empty:
+            continue
+
+        if kind == "numeric":
+            values = values.astype(float).to_numpy()
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, NUM_BINS + 1)[1:-1]))
+            counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+            baseline[field] = {
+                "kind": "numeric",
+                "column": column,
+                "edges": edges.tolist(),
+                "proportions": (counts / counts.sum()).tolist(),
+                "mean": float(values.mean()),
+                "std": float(values.std(ddof=1)) if len(values) > 1 else 0.0,
+            }
+        else:
+            normalized = values.map(normalize_category)
+            proportions = normalized.value_counts(normalize=True)
+            if len(proportions) > MAX_CATEGORIES:
+                top = proportions.iloc[:MAX_CATEGORIES - 1]
+                proportions = dict(top)
+                proportions[OTHER] = float(1.0 - top.sum())
+            baseline[field] = {
+                "kind": "categorical",
+                "column": column,
+                "proportions": {k: float(v) for k, v in dict(proportions).items()},
+            }
+    return baseline
+
+
+def load_baseline(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def benchmark(iterations: int = 100000):
+    """Print the per-update cost in microseconds"""
+    import random
+
+    import pandas as pd
+
+    rng = random.Random(42)
+    records = [{
+        "age": rng.randint(18, 90),
+        "bmi": rng.uniform(16, 45),
+        "sleep_hours": rng.randint(3, 12),
+        "sex": rng.choice(["Male", "Female"]),
+        "smoking": rng.choice(["Yes", "No"]),
+        "physical_activity": rng.choice(["Yes", "No"]),
+        "alcohol": rng.choice(["Yes", "No"]),
+        "general_health": rng.choice(["Poor", "Fair", "Good", "Very Good", "Excellent"]),
+        "diabetes": rng.choice(["Yes", "No"]),
+    } for _ in range(1000)]
+    monitor = DriftMonitor(baseline_from_dataframe(pd.DataFrame(records)))
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        monitor.update(records[i % len(records)])
+    elapsed = time.perf_counter() - start
+
+    print(f"[DRIFT] {iterations} updates: {elapsed / iterations * 1e6:.2f} us/update (wall)")
+    report = monitor.report()
+    print(f"[DRIFT] self-timed: {report['update_us_mean']} us mean, {report['update_us_max']} us max")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the drift baseline or benchmark updates")
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser.add_argument('--data', default=os.path.join(base_dir, 'models', 'final_heart_dataset.csv'))
+    parser.add_argument('--out', default=os.path.join(base_dir, 'models', 'drift_baseline.json'))
+    parser.add_argument('--bench', action='store_true')
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark()
+    else:
+        import pandas as pd
+
+        baseline = baseline_from_dataframe(pd.read_csv(args.data))
+        with open(args.out, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"[OK] Drift baseline for {sorted(baseline)} saved to {args.out}")
@@ -0,0 +1,139 @@
+"""
+Nearest-neighbor index of precomputed LIME explanations.
+
+build_explanations.py runs LIME offline for a sample of training profiles
+and stores each explanation as a dense weight vector, together with a
+KD-tree (or ball tree, for wide feature sets) over the scaled features.
+At serve time the explanations of the nearest indexed profiles are
+interpolated by inverse distance, with a confidence that decays as the
+query moves away from the indexed data. Exact LIME is only run when no
+neighbor is close enough.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+from sklearn.neighbors import BallTree, KDTree
+
+INDEX_FILE = "explanation_index.joblib"
+CLASS_NAMES = ["No Disease", "Disease"]
+
+# KD-trees lose their edge over ball trees beyond a couple of dozen dims
+KD_TREE_MAX_DIMS = 20
+
+
+def build_tree(points: np.ndarray):
+    if points.shape[1] <= KD_TREE_MAX_DIMS:
+        return KDTree(points)
+    return BallTree(points)
+
+
+def lime_explainer(background: np.ndarray, feature_names: List[str], seed: int = 42):
+    """Tabular LIME explainer configured as in heart_model_training.ipynb"""
+    from lime.lime_tabular import LimeTabularExplainer
+
+    return LimeTabularExplainer(
+        training_data=background,
+        feature_names=feature_names,
+        class_names=CLASS_NAMES,
+        mode="classification",
+        random_state=seed
+    )
+
+
+def explain_dense(explainer, model, row: np.ndarray, n_features: int, num_features: int) -> np.ndarray:
+    """LIME weights for the positive class as a dense vector"""
+    exp = explainer.explain_instance(row, model.predict_proba, num_features=num_features, labels=(1,))
+    weights = np.zeros(n_features, dtype=np.float32)
+    for index, weight in exp.as_map()[1]:
+        weights[index] = weight
+    return weights
+
+
+class ExplanationIndex:
+    """Serve-time lookup over precomputed explanations"""
+
+    def __init__(self, payload: Dict, k: int = 5, max_distance_factor: float = 3.0):
+        self.payload = payload
+        self.version = payload["version"]
+        self.feature_names = payload["feature_names"]
+        self.points = payload["points"]
+        self.weights = payload["weights"]
+        self.probabilities = payload["probabilities"]
+        self.tree = payload["tree"]
+        # Typical distance from an indexed profile to its nearest neighbor
+        self.scale = max(payload["nn_distance_median"], 1e-9)
+        self.k = min(k, len(self.points))
+        self.max_distance = max_distance_factor * self.scale
+        self.num_features = payload["num_features"]
+        self._explainer = None
+        self._explainer_lock = threading.Lock()
+        self.hits = 0
+        self.exact = 0
+
+    def explain(self, row: np.ndarray, model=None, top: int = 10) -> Dict:
+        """Interpolated explanation for one scaled row, or exact LIME when far"""
+        distances, indices = self.tree.query(row.reshape(1, -1), k=self.k)
+        distances, indices = distances[0], indices[0]
+
+        if distances[0] > self.max_distance and model is not None:
+            exact = self._exact(row, model)
+            if exact is not None:
+                self.exact += 1
+                return {
+                    "method": "exact",
+                    "confidence": 1.0,
+                    "nearest_distance": float(distances[0]),
+                    "explanation": self._format(exact, top),
+                }
+
+        self.hits += 1
+        inverse = 1.0 / (distances + 1e-9)
+        share = inverse / inverse.sum()
+        weights = share @ self.weights[indices]
+        confidence = float(np.exp(-(share @ distances) / self.scale))
+        return {
+            "method": "nearest_neighbors",
+            "confidence": round(confidence, 4),
+            "neighbors": int(len(indices)),
+            "nearest_distance": float(distances[0]),
+            "neighbor_probability": float(share @ self.probabilities[indices]),
+            "explanation": self._format(weights, top),
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "version": self.version,
+            "profiles": int(len(self.points)),
+            "tree": type(self.tree).__name__,
+            "max_distance": round(self.max_distance, 4),
+            "nearest_neighbor_hits": self.hits,
+            "exact_fallbacks": self.exact,
+        }
+
+    def _exact(self, row: np.ndarray, model) -> Optional[np.ndarray]:
+        try:
+            with self._explainer_lock:
+                if self._explainer is None:
+                    self._explainer = lime_explainer(self.payload["background"], self.feature_names)
+            return explain_dense(self._explainer, model, row, len(self.feature_names), self.num_features)
+        except ImportError:
+            # lime is optional at serve time; the interpolated answer is still returned
+            return None
+
+    def _format(self, weights: np.ndarray, top: int) -> List[Dict]:
+        order = np.argsort(-np.abs(weights))[:top]
+        return [
+            {"feature": self.feature_names[i], "weight": round(float(weights[i]), 5)}
+            for i in order if weights[i] != 0
+        ]
+
+
+def load_index(models_dir: str, **kwargs) -> Optional[ExplanationIndex]:
+    path = os.path.join(models_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return None
+    return ExplanationIndex(joblib.load(path), **kwargs)
@@ -0,0 +1,93 @@
+"""
+Versioned feature schema shared by training (select_features.py) and serving.
+
+The schema lists the exact columns the exported model was trained on, in
+order, together with the model/scaler files and per-column training means.
+Serving encodes only those columns from a request; columns the API cannot
+supply are filled with their training mean (0 after scaling).
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+SCHEMA_FILE = "feature_schema.json"
+
+
+def _key(name: str) -> str:
+    return name.lower().replace("_", "").replace(" ", "")
+
+
+def _yes(value: str) -> int:
+    return 1 if str(value).lower() == "yes" else 0
+
+
+# Normalized column name -> encoder for a HealthData request
+# (same 0/1 encoding predict() has always used)
+FIELD_ENCODERS = {
+    "age": lambda d: d.age,
+    "sex": lambda d: 1 if d.sex.lower() == "male" else 0,
+    "bmi": lambda d: d.bmi,
+    "smoking": lambda d: _yes(d.smoking),
+    "smoker": lambda d: _yes(d.smoking),
+    "physicalactivity": lambda d: _yes(d.physical_activity),
+    "physicalactivities": lambda d: _yes(d.physical_activity),
+    "alcohol": lambda d: _yes(d.alcohol),
+    "alcoholdrinking": lambda d: _yes(d.alcohol),
+    "alcoholdrinkers": lambda d: _yes(d.alcohol),
+    "sleephours": lambda d: d.sleep_hours,
+    "diabetes": lambda d: _yes(d.diabetes),
+    "diabetic": lambda d: _yes(d.diabetes),
+}
+
+# One-hot columns such as "GeneralHealth_Fair"
+ONE_HOT_PREFIXES = {
+    "generalhealth": lambda d: d.general_health,
+}
+
+
+def column_encoder(column: str):
+    """Encoder for one schema column, or None if the API cannot supply it"""
+    key = _key(column)
+    if key in FIELD_ENCODERS:
+        return FIELD_ENCODERS[key]
+    prefix, _, category = column.partition("_")
+    if category and _key(prefix) in ONE_HOT_PREFIXES:
+        getter = ONE_HOT_PREFIXES[_key(prefix)]
+        return lambda d: 1 if str(getter(d)).lower() == category.lower() else 0
+    return None
+
+
+class FeatureSchema:
+    """Request encoder for the reduced feature set"""
+
+    def __init__(self, schema: Dict):
+        self.schema = schema
+        self.version = schema["version"]
+        self.features = schema["features"]
+        self.defaults = np.array([schema["defaults"][f] for f in self.features], dtype=float)
+        self._encoders = [column_encoder(f) for f in self.features]
+        self.missing = [f for f, enc in zip(self.features, self._encoders) if enc is None]
+
+    def encode(self, data) -> np.ndarray:
+        """Encode a HealthData request as a (1, n_features) row"""
+        row = self.defaults.copy()
+        for index, encoder in enumerate(self._encoders):
+            if encoder is not None:
+                row[index] = encoder(data)
+        return row.reshape(1, -1)
+
+
+def load_schema(models_dir: str) -> Optional[FeatureSchema]:
+    path = os.path.join(models_dir, SCHEMA_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return FeatureSchema(json.load(f))
+
+
+def save_schema(models_dir: str, schema: Dict):
+    with open(os.path.join(models_dir, SCHEMA_FILE), "w") as f:
+        json.dump(schema, f, indent=2)
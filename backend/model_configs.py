@@ -0,0 +1,80 @@
+"""
+Candidate models with the hyperparameters from heart_model_training.ipynb.
+
+Single definition shared by select_features.py, compare_models.py and the
+synthetic model in benchmarks/micro.py.
+"""
+
+from typing import List
+
+MODEL_PARAMS = {
+    "random_forest": {
+        "n_estimators": 600,
+        "max_depth": 25,
+        "min_samples_split": 4,
+        "min_samples_leaf": 2,
+        "class_weight": "balanced",
+        "n_jobs": -1,
+        "random_state": 42,
+    },
+    # rf_final: the forest the notebook saves as heart_model_final.pkl
+    "random_forest_final": {
+        "n_estimators": 800,
+        "max_depth": 22,
+        "min_samples_split": 4,
+        "min_samples_leaf": 2,
+        "class_weight": "balanced",
+        "n_jobs": -1,
+        "random_state": 42,
+    },
+    "gradient_boosting": {
+        "n_estimators": 500,
+        "learning_rate": 0.05,
+        "max_depth": 6,
+        "subsample": 0.9,
+        "random_state": 42,
+    },
+    "xgboost": {
+        "n_estimators": 500,
+        "max_depth": 6,
+        "learning_rate": 0.05,
+        "subsample": 0.9,
+        "colsample_bytree": 0.9,
+        "eval_metric": "logloss",
+        "random_state": 42,
+    },
+}
+
+
+def _estimator_class(name: str):
+    if name in ("random_forest", "random_forest_final"):
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier
+    if name == "gradient_boosting":
+        from sklearn.ensemble import GradientBoostingClassifier
+        return GradientBoostingClassifier
+    if name == "xgboost":
+        # Optional dependency; raises ImportError when not installed
+        from xgboost import XGBClassifier
+        return XGBClassifier
+    raise KeyError(f"Unknown model '{name}'")
+
+
+def build_model(name: str, n_estimators: int = 0):
+    """Unfitted model with notebook hyperparameters; n_estimators overrides the tree count"""
+    params = dict(MODEL_PARAMS[name])
+    if n_estimators:
+        params["n_estimators"] = n_estimators
+    return _estimator_class(name)(**params)
+
+
+def available_models() -> List[str]:
+    """Models whose library is installed"""
+    names = []
+    for name in MODEL_PARAMS:
+        try:
+            _estimator_class(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
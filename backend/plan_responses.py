@@ -0,0 +1,225 @@
+"""
+Precomputed fallback diet/exercise plan responses.
+
+The fallback plans only vary by age and sex (the exercise plan also
+derives a target heart-rate range from age), so the full /plan JSON body
+for every age/sex pair is rendered once at startup and kept gzip (and
+brotli, when installed) compressed with a strong ETag per encoding.
+
+The cacheable form is GET /plan/{plan_type}?age=&sex= (ETag, 304 on
+If-None-Match, public max-age). POST /plan responses are never cached by
+HTTP caches and must not answer conditionals with 304, so POST gets the
+same precompressed bytes unconditionally, with a Content-Location that
+points at the GET resource.
+"""
+
+import gzip
+import hashlib
+import json
+from functools import lru_cache
+from typing import Dict, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PRECOMPUTED_AGES = range(1, 121)
+PRECOMPUTED_SEXES = ("Male", "Female")
+CACHE_CONTROL = "public, max-age=86400"
+
+
+def fallback_diet_plan(age: int, sex: str) -> str:
+    """Static heart-healthy diet plan used when Claude is unavailable"""
+    return f"""Personalized Heart-Healthy Diet Plan for {age}-year-old {sex}:
+
+DAILY MEAL PLAN:
+• Breakfast: Oatmeal with berries OR Greek yogurt with banana
+• Lunch: Grilled chicken salad OR lentil soup with whole grain bread
+• Dinner: Baked salmon with vegetables OR stir-fried tofu with brown rice
+• Snacks: Apple with almond butter, carrot sticks with hummus
+
+HEART-HEALTHY TIPS:
+1. Eat more fruits and vegetables (5+ servings daily)
+2. Choose whole grains over refined grains
+3. Include healthy fats (avocado, nuts, olive oil)
+4. Limit processed foods and added sugars
+5. Control portion sizes
+6. Stay hydrated with water
+
+FOODS TO FOCUS ON:
+• Fruits, vegetables, whole grains
+• Lean proteins (fish, poultry, beans)
+• Healthy fats (nuts, seeds, olive oil)
+• Low-fat dairy
+
+FOODS TO LIMIT:
+• Processed meats
+• Sugary drinks and snacks
+• High-sodium foods
+• Trans fats (fried foods, baked goods)"""
+
+
+def fallback_exercise_plan(age: int, sex: str) -> str:
+    """Static exercise plan used when Claude is unavailable"""
+    return f"""Personalized Exercise Plan for {age}-year-old {sex}:
+
+WEEKLY SCHEDULE:
+• Monday: 30 min brisk walking or cycling
+• Tuesday: Strength training (bodyweight exercises)
+• Wednesday: Rest or gentle stretching
+• Thursday: 30 min swimming or elliptical
+• Friday: Strength training
+• Saturday: 45 min moderate activity (hiking, dancing)
+• Sunday: Active rest (yoga or walking)
+
+EXERCISE GUIDELINES:
+1. Warm up: 5-10 min light cardio
+2. Cool down: 5-10 min stretching
+3. Target heart rate: {(220 - age) * 0.6:.0f}-{(220 - age) * 0.8:.0f} BPM
+4. Stay hydrated before, during, after
+5. Listen to your body - rest if needed
+
+BEGINNER TIPS:
+• Start with 10-15 min sessions
+• Gradually increase duration and intensity
+• Focus on consistency, not perfection
+• Include rest days for recovery
+
+SAFETY NOTES:
+• Consult doctor before starting new exercise
+• Stop if you feel pain or dizziness
+• Use proper form to prevent injury
+• Wear appropriate footwear"""
+
+
+PLAN_BUILDERS = {
+    "diet": fallback_diet_plan,
+    "exercise": fallback_exercise_plan,
+}
+
+
+class PlanEntry:
+    """One rendered /plan body in every supported content encoding"""
+
+    def __init__(self, text: str):
+        self.text = text
+        body = json.dumps({"plan": text}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # Strong ETags must differ between content codings
+        self.bodies: Dict[str, Tuple[bytes, str]] = {
+            "identity": (body, f'"{digest}"'),
+            "gzip": (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gz"'),
+        }
+        if brotli is not None:
+            self.bodies["br"] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+
+    def etags(self):
+        return [etag for _, etag in self.bodies.values()]
+
+
+class PrecomputedPlans:
+    """Fallback plan bodies for the finite age/sex domain, built once"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, int, str], PlanEntry] = {}
+        for plan_type, builder in PLAN_BUILDERS.items():
+            for age in PRECOMPUTED_AGES:
+                for sex in PRECOMPUTED_SEXES:
+                    self._entries[(plan_type, age, sex)] = PlanEntry(builder(age, sex))
+
+    def get(self, plan_type: str, age: int, sex: str) -> PlanEntry:
+        entry = self._entries.get((plan_type, age, sex))
+        if entry is None:
+            # Outside the precomputed domain (unusual age or sex value)
+            entry = _build_entry(plan_type, age, sex)
+        return entry
+
+    def text(self, plan_type: str, age: int, sex: str) -> str:
+        return self.get(plan_type, age, sex).text
+
+    def response(self, request: Request, plan_type: str, age: int, sex: str,
+                 conditional: bool = True) -> Response:
+        """
+        Serve a plan in the best accepted encoding.
+
+        With `conditional` (GET only) the response carries an ETag and
+        Cache-Control and a matching If-None-Match gets a 304. Otherwise
+        (POST) it is a plain 200 pointing at the cacheable GET resource.
+        """
+        entry = self.get(plan_type, age, sex)
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), entry.bodies)
+        body, etag = entry.bodies[encoding]
+        headers = {"Vary": "Accept-Encoding"}
+
+        if conditional:
+            headers["ETag"] = etag
+            headers["Cache-Control"] = CACHE_CONTROL
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match and _etag_matches(if_none_match, entry.etags()):
+                return Response(status_code=304, headers=headers)
+        else:
+            headers["Content-Location"] = plan_url(plan_type, age, sex)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self) -> Dict:
+        raw = sum(len(e.bodies["identity"][0]) for e in self._entries.values())
+        stored = sum(len(b) for e in self._entries.values() for b, _ in e.bodies.values())
+        return {
+            "entries": len(self._entries),
+            "encodings": sorted(next(iter(self._entries.values())).bodies) if self._entries else [],
+            "raw_bytes": raw,
+            "stored_bytes": stored,
+        }
+
+
+def plan_url(plan_type: str, age: int, sex: str) -> str:
+    """Path of the cacheable GET resource for a precomputed plan"""
+    return f"/plan/{plan_type}?{urlencode({'age': age, 'sex': sex})}"
+
+
+@lru_cache(maxsize=256)
+def _build_entry(plan_type: str, age: int, sex: str) -> PlanEntry:
+    return PlanEntry(PLAN_BUILDERS[plan_type](age, sex))
+
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """Pick br, then gzip, then identity from an Accept-Encoding header"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token] = quality
+
+    for encoding in ("br", "gzip"):
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if encoding in available and quality > 0:
+            return encoding
+    return "identity"
+
+
+def _etag_matches(if_none_match: str, etags) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in etags:
+            return True
+    return False
@@ -0,0 +1,259 @@
+"""
+Feature selection stage: permutation importance, subset search, schema export.
+
+1. Splits the data as the notebook does, then holds back a validation
+   slice of the training split. The test split is only used for the
+   final report.
+2. Fits (or loads) a random forest on every column of the fit slice,
+   using the notebook's hyperparameters.
+3. Computes permutation importance on the validation slice on a process
+   pool, one task per feature. Results are cached under models/cache/,
+   keyed by the data, model and settings, so re-runs are instant.
+4. Binary-searches the smallest top-k subset, among the columns the API
+   can supply (feature_schema.column_encoder), whose validation accuracy
+   stays within --tolerance of the full model. Columns the API cannot
+   fill would be imputed with training means at serve time, so they are
+   never selected.
+5. Refits the chosen subset on the whole training split, reports its test
+   accuracy and exports the model, a scaler fitted on just those columns
+   and a versioned feature_schema.json that backend_api.py picks up at
+   startup.
+
+Usage:
+    python select_features.py
+    python select_features.py --tolerance 0.005 --workers 8 --n-estimators 300
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from feature_schema import column_encoder, save_schema
+from model_configs import build_model
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+models_dir = os.path.join(base_dir, 'models')
+
+# Filled in each worker process by _init_worker
+_worker_state = {}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Select features and export a reduced schema")
+    parser.add_argument('--data', default=os.path.join(models_dir, 'final_heart_dataset.csv'))
+    parser.add_argument('--target', default='heart_disease')
+    parser.add_argument('--model', default='',
+                        help="Model fitted on all columns of the fit slice (default: train one); "
+                             "a model fitted on the whole training split inflates validation scores")
+    parser.add_argument('--n-estimators', type=int, default=600)
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help="Max validation accuracy drop allowed versus the full model")
+    parser.add_argument('--n-repeats', type=int, default=5)
+    parser.add_argument('--validation-size', type=float, default=0.2,
+                        help="Share of the training split held back to choose k")
+    parser.add_argument('--sample', type=int, default=10000,
+                        help="Validation rows used for permutation importance")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--out-dir', default=models_dir)
+    return parser.parse_args()
+
+
+def _init_worker(model, X, y):
+    # Parallelism comes from the pool; keep each worker single-threaded
+    if hasattr(model, "n_jobs"):
+        model.set_params(n_jobs=1)
+    _worker_state["model"] = model
+    _worker_state["X"] = X
+    _worker_state["y"] = y
+    _worker_state["baseline"] = accuracy_score(y, model.predict(X))
+
+
+def _permute_feature(task):
+    """Mean/std accuracy drop from shuffling one column"""
+    column, n_repeats, seed = task
+    model, X, y = _worker_state["model"], _worker_state["X"], _worker_state["y"]
+    rng = np.random.default_rng(seed + column)
+    X_perm = X.copy()
+    drops = []
+    for _ in range(n_repeats):
+        X_perm[:, column] = rng.permutation(X[:, column])
+        drops.append(_worker_state["baseline"] - accuracy_score(y, model.predict(X_perm)))
+    return column, float(np.mean(drops)), float(np.std(drops))
+
+
+def permutation_importance_parallel(model, X, y, n_repeats, workers, seed=42):
+    tasks = [(column, n_repeats, seed) for column in range(X.shape[1])]
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model, X, y)) as pool:
+        for column, mean, std in pool.map(_permute_feature, tasks):
+            results[column] = (mean, std)
+    return [results[c] for c in range(X.shape[1])]
+
+
+def cache_key(X, y, model_id: str, args) -> str:
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    digest.update(model_id.encode())
+    digest.update(f"{args.n_repeats}:{args.sample}".encode())
+    return digest.hexdigest()[:16]
+
+
+def fit_subset(features, train_df, eval_df, y_train, y_eval, n_estimators):
+    scaler = StandardScaler()
+    X_tr = scaler.fit_transform(train_df[features].values)
+    X_ev = scaler.transform(eval_df[features].values)
+    model = build_model("random_forest", n_estimators)
+    model.fit(X_tr, y_train)
+    return model, scaler, accuracy_score(y_eval, model.predict(X_ev))
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+
+    df = pd.read_csv(args.data)
+    X_df = df.drop(args.target, axis=1)
+    y = df[args.target].values
+    columns = list(X_df.columns)
+
+    # Same split as heart_model_training.ipynb; the test split is only
+    # touched for the final report
+    train_df, test_df, y_train, y_test = train_test_split(
+        X_df, y,
+        test_size=0.2,
+        random_state=42,
+        stratify=y
+    )
+    fit_df, val_df, y_fit, y_val = train_test_split(
+        train_df, y_train,
+        test_size=args.validation_size,
+        random_state=42,
+        stratify=y_train
+    )
+    scaler = StandardScaler()
+    X_fit = scaler.fit_transform(fit_df.values)
+    X_val = scaler.transform(val_df.values)
+    X_test = scaler.transform(test_df.values)
+
+    if args.model:
+        full_model = joblib.load(args.model)
+        with open(args.model, 'rb') as f:
+            model_id = hashlib.sha256(f.read()).hexdigest()
+    else:
+        print(f"[FEATURES] Training full forest on {len(columns)} columns")
+        full_model = build_model("random_forest", args.n_estimators)
+        full_model.fit(X_fit, y_fit)
+        model_id = json.dumps(full_model.get_params(), sort_keys=True, default=str)
+    full_val_acc = accuracy_score(y_val, full_model.predict(X_val))
+    print(f"[FEATURES] Full model validation accuracy: {full_val_acc:.4f}")
+
+    # Permutation importance on a sample of the validation slice
+    rng = np.random.default_rng(42)
+    sample = rng.choice(len(X_val), size=min(args.sample, len(X_val)), replace=False)
+    X_eval, y_eval = X_val[sample], y_val[sample]
+
+    cache_dir = os.path.join(args.out_dir, 'cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = os.path.join(cache_dir, f"permutation_importance_{cache_key(X_eval, y_eval, model_id, args)}.json")
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            importance = json.load(f)
+        print(f"[FEATURES] Loaded cached permutation importance from {cache_path}")
+    else:
+        t = time.perf_counter()
+        scores = permutation_importance_parallel(full_model, X_eval, y_eval, args.n_repeats, args.workers)
+        importance = {col: {"mean": m, "std": s} for col, (m, s) in zip(columns, scores)}
+        with open(cache_path, 'w') as f:
+            json.dump(importance, f, indent=2)
+        print(f"[FEATURES] Permutation importance on {args.workers} workers: {time.perf_counter() - t:.1f}s")
+
+    # Only columns the API can fill are candidates; anything else would be
+    # served as its training mean and the validation score would not hold
+    servable = [c for c in columns if column_encoder(c) is not None]
+    unservable = [c for c in columns if column_encoder(c) is None]
+    if not servable:
+        raise SystemExit("[ERROR] None of the dataset columns can be encoded from an API request "
+                         "(see FIELD_ENCODERS in feature_schema.py)")
+    if unservable:
+        print(f"[FEATURES] Not supplied by the API, excluded: {unservable}")
+    ranked = sorted(servable, key=lambda c: importance[c]["mean"], reverse=True)
+
+    # Smallest k with validation accuracy >= full - tolerance (binary search over k)
+    target_acc = full_val_acc - args.tolerance
+    trials = {}
+
+    def evaluate(k):
+        if k not in trials:
+            trials[k] = fit_subset(ranked[:k], fit_df, val_df, y_fit, y_val, args.n_estimators)[2]
+            print(f"[FEATURES] top-{k}: validation accuracy {trials[k]:.4f}")
+        return trials[k]
+
+    low, high = 1, len(ranked)
+    while low < high:
+        mid = (low + high) // 2
+        if evaluate(mid) >= target_acc:
+            high = mid
+        else:
+            low = mid + 1
+    best_k = low
+    within_tolerance = evaluate(best_k) >= target_acc
+    if not within_tolerance:
+        # Nothing servable is close enough; ship the best subset tried
+        best_k = max(trials, key=lambda k: (trials[k], -k))
+        print(f"[WARNING] No subset of the API-supplied columns is within {args.tolerance} of the "
+              f"full model; best was top-{best_k} at {trials[best_k]:.4f} vs {full_val_acc:.4f}")
+    val_acc = trials[best_k]
+
+    # Refit the chosen subset on the whole training split; report on test
+    features = ranked[:best_k]
+    model, subset_scaler, subset_acc = fit_subset(features, train_df, test_df, y_train, y_test, args.n_estimators)
+    full_acc = accuracy_score(y_test, full_model.predict(X_test))
+
+    created = datetime.now(timezone.utc)
+    version = f"{created:%Y%m%d%H%M%S}-{hashlib.sha256(','.join(features).encode()).hexdigest()[:8]}"
+    model_file = f"reduced_model_{version}.pkl"
+    scaler_file = f"reduced_scaler_{version}.pkl"
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(args.out_dir, model_file))
+    joblib.dump(subset_scaler, os.path.join(args.out_dir, scaler_file))
+    save_schema(args.out_dir, {
+        "version": version,
+        "created": created.isoformat(timespec="seconds"),
+        "target": args.target,
+        "features": features,
+        "defaults": {f: float(train_df[f].mean()) for f in features},
+        "model_file": model_file,
+        "scaler_file": scaler_file,
+        "accuracy": subset_acc,
+        "full_accuracy": full_acc,
+        "validation_accuracy": val_acc,
+        "full_validation_accuracy": full_val_acc,
+        "within_tolerance": within_tolerance,
+        "full_feature_count": len(columns),
+        "excluded_features": unservable,
+        "tolerance": args.tolerance,
+        "permutation_importance": {f: importance[f] for f in features},
+    })
+
+    print(f"[FEATURES] Selected {best_k}/{len(columns)} features: {features}")
+    print(f"[FEATURES] Test accuracy {subset_acc:.4f} vs full {full_acc:.4f} "
+          f"(validation {val_acc:.4f} vs {full_val_acc:.4f}, tolerance {args.tolerance})")
+    print(f"[OK] Exported schema {version} to {args.out_dir} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
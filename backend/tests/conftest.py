@@ -0,0 +1,42 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+repo_dir = os.path.dirname(backend_dir)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+
+@pytest.fixture(scope="session")
+def backend_api():
+    """backend_api imported without Claude and with a throwaway audit log"""
+    os.environ["CLAUDE_API_KEY"] = ""
+    os.environ["AUDIT_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="test-audit-"), "audit.db")
+    import backend_api
+
+    yield backend_api
+    backend_api.audit_log.close()
+
+
+class StubMessage:
+    def __init__(self, text):
+        self.content = [type("Block", (), {"type": "text", "text": text})()]
+
+
+class StubClaude:
+    """Stands in for anthropic.Anthropic; records every messages.create call"""
+
+    def __init__(self, reply="Stub reply", error=None):
+        self.reply = reply
+        self.error = error
+        self.calls = []
+        self.messages = self
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.error is not None:
+            raise self.error
+        return StubMessage(self.reply)
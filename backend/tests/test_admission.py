@@ -0,0 +1,213 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from admission import AdmissionController, Lane
+from conftest import StubClaude
+
+PROFILE = {
+    "age": 50, "sex": "Male", "bmi": 25.0, "smoking": "No", "physical_activity": "Yes",
+    "alcohol": "No", "general_health": "Good", "sleep_hours": 7, "diabetes": "No",
+}
+
+
+def make_lanes(queue_timeout=5.0):
+    """Same lane layout as backend_api.py, with small limits"""
+    return [
+        Lane("predict", ["/predict", "/analyze"], max_concurrent=2, max_queue=1,
+             queue_timeout=queue_timeout, priority=0),
+        Lane("chat", ["/chat"], max_concurrent=2, max_queue=2,
+             queue_timeout=queue_timeout, priority=1, degrade=True),
+        Lane("plan", ["/plan"], max_concurrent=2, max_queue=2,
+             queue_timeout=queue_timeout, priority=1, degrade=True),
+    ]
+
+
+def make_controller():
+    lane = Lane("predict", ["/predict"], max_concurrent=1, max_queue=5, queue_timeout=5.0)
+    return AdmissionController([lane]), lane
+
+
+def test_cancel_after_handover_releases_the_slot():
+    async def scenario():
+        controller, lane = make_controller()
+        assert await controller.admit(lane)
+        queued = asyncio.ensure_future(controller.admit(lane))
+        await asyncio.sleep(0)
+        assert len(lane.waiters) == 1
+
+        # Slot is handed to the waiter, then its request is cancelled
+        # before it gets to run
+        controller.release(lane)
+        queued.cancel()
+        try:
+            admitted = await queued
+        except asyncio.CancelledError:
+            admitted = False
+        if admitted:
+            # Python < 3.12: wait_for swallows a cancel that races a
+            # completed future, so the caller holds the slot as usual
+            controller.release(lane)
+
+        assert lane.active == 0
+        assert not lane.waiters
+        assert await controller.admit(lane)
+
+    asyncio.run(scenario())
+
+
+def test_cancel_while_waiting_leaves_the_queue():
+    async def scenario():
+        controller, lane = make_controller()
+        assert await controller.admit(lane)
+        queued = asyncio.ensure_future(controller.admit(lane))
+        await asyncio.sleep(0)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+
+        assert not lane.waiters
+        controller.release(lane)
+        assert lane.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_llm_lanes_shed_while_predict_is_saturated():
+    async def scenario():
+        controller = AdmissionController(make_lanes())
+        predict, chat = controller.lanes["predict"], controller.lanes["chat"]
+
+        assert await controller.admit(chat)
+        controller.release(chat)
+
+        for _ in range(predict.max_concurrent):
+            assert await controller.admit(predict)
+        assert not await controller.admit(chat)
+        assert chat.shed == 1
+
+        controller.release(predict)
+        assert await controller.admit(chat)
+        # Lower-priority traffic never sheds predict
+        assert await controller.admit(predict)
+
+    asyncio.run(scenario())
+
+
+def test_queue_deadline_and_queue_bound():
+    async def scenario():
+        controller = AdmissionController(make_lanes(queue_timeout=0.05))
+        predict = controller.lanes["predict"]
+        for _ in range(predict.max_concurrent):
+            assert await controller.admit(predict)
+
+        start = time.perf_counter()
+        queued = asyncio.ensure_future(controller.admit(predict))
+        await asyncio.sleep(0)
+        # Queue holds one waiter; the next request is shed without waiting
+        assert not await controller.admit(predict)
+        assert time.perf_counter() - start < 0.05
+
+        assert not await queued
+        assert time.perf_counter() - start >= 0.05
+        assert predict.shed == 2
+        assert not predict.waiters
+        assert predict.active == predict.max_concurrent
+
+    asyncio.run(scenario())
+
+
+def test_release_hands_the_slot_to_the_oldest_waiter():
+    async def scenario():
+        controller = AdmissionController(make_lanes())
+        chat = controller.lanes["chat"]
+        for _ in range(chat.max_concurrent):
+            assert await controller.admit(chat)
+        first = asyncio.ensure_future(controller.admit(chat))
+        second = asyncio.ensure_future(controller.admit(chat))
+        await asyncio.sleep(0)
+
+        controller.release(chat)
+        assert await first
+        assert not second.done()
+        assert chat.active == chat.max_concurrent
+
+        controller.release(chat)
+        assert await second
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def saturated_api(backend_api, monkeypatch):
+    """backend_api with every predict slot taken and its queue disabled"""
+    controller = AdmissionController(make_lanes())
+    predict = controller.lanes["predict"]
+    predict.active = predict.max_concurrent
+    predict.max_queue = 0
+    stub = StubClaude()
+    monkeypatch.setattr(backend_api, "admission", controller)
+    monkeypatch.setattr(backend_api, "claude_client", stub)
+    monkeypatch.setattr(backend_api, "claude_available", True)
+    return TestClient(backend_api.app), controller, stub
+
+
+def test_shed_chat_and_plan_get_degraded_fallbacks(saturated_api):
+    client, controller, stub = saturated_api
+
+    chat = client.post("/chat", json={"message": "What should I eat?"})
+    plan = client.post("/plan", json={"plan_type": "exercise", "health_data": PROFILE})
+
+    assert chat.status_code == 200 and chat.json()["response"]
+    assert plan.status_code == 200
+    assert "content-location" in plan.headers
+    assert stub.calls == []
+    assert controller.lanes["chat"].shed == 1
+    assert controller.lanes["plan"].shed == 1
+    # Degraded requests never take a slot
+    assert controller.lanes["chat"].active == 0
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/predict", PROFILE),
+    ("/analyze", {"health_data": PROFILE}),
+])
+def test_shed_predict_gets_503_with_retry_after(saturated_api, path, body):
+    client, controller, stub = saturated_api
+
+    response = client.post(path, json=body)
+
+    assert response.status_code == 503
+    retry_after = controller.retry_after(controller.lanes["predict"])
+    assert response.headers["Retry-After"] == str(retry_after)
+    assert response.json()["retry_after"] == retry_after
+
+
+class ThreadRecordingModel:
+    """Minimal classifier that remembers which thread scored it"""
+
+    def __init__(self):
+        self.threads = []
+
+    def predict_proba(self, rows):
+        self.threads.append(threading.get_ident())
+        return np.array([[0.7, 0.3]] * len(rows))
+
+
+def test_predict_scores_off_the_event_loop(backend_api, monkeypatch):
+    model = ThreadRecordingModel()
+    monkeypatch.setattr(backend_api, "model", model)
+    monkeypatch.setattr(backend_api, "scaler", object())
+    monkeypatch.setattr(backend_api, "cascade_model", None)
+
+    async def scenario():
+        result = await backend_api.predict(backend_api.HealthData(**PROFILE))
+        return result, threading.get_ident()
+
+    result, loop_thread = asyncio.run(scenario())
+
+    assert result.risk_percentage == 30.0
+    assert model.threads and model.threads[0] != loop_thread
@@ -0,0 +1,159 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import audit_log
+from audit_log import AuditLog, AuditUnavailable, query
+
+PREDICT_BODY = {
+    "age": 50, "sex": "Male", "bmi": 25.0, "smoking": "No", "physical_activity": "Yes",
+    "alcohol": "No", "general_health": "Good", "sleep_hours": 7, "diabetes": "No",
+}
+
+
+def record(log, n=1, risk_level="Low Risk", model_version="v1"):
+    async def go():
+        for i in range(n):
+            await log.record("/predict", model_version, "ml", 10.0 + i, risk_level, {"i": i})
+    asyncio.run(go())
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class StalledAuditLog(AuditLog):
+    """Writer thread blocks on its first batch until `resume` is set"""
+
+    def __init__(self, *args, **kwargs):
+        self.resume = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def _write(self, conn, batch):
+        self.resume.wait()
+        super()._write(conn, batch)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "audit.db")
+
+
+def test_background_writer_flushes_in_batches(db_path):
+    log = AuditLog(db_path, batch_size=3, flush_interval=0.05)
+    record(log, 7)
+    wait_for(lambda: log.written == 7)
+
+    assert log.batches >= 3
+    assert len(query(db_path)) == 7
+    log.close()
+
+
+def test_close_flushes_queued_records(db_path):
+    log = AuditLog(db_path, flush_interval=10.0)
+    record(log, 5)
+    log.close()
+
+    assert log.written == 5
+    assert [r["inputs"]["i"] for r in query(db_path)] == [4, 3, 2, 1, 0]
+    with pytest.raises(AuditUnavailable):
+        record(log)
+
+
+def test_table_is_append_only(db_path):
+    log = AuditLog(db_path)
+    record(log)
+    log.close()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+            conn.execute("UPDATE prediction_audit SET risk_level = 'None'")
+        with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+            conn.execute("DELETE FROM prediction_audit")
+    finally:
+        conn.close()
+
+
+def test_query_filters(db_path, monkeypatch):
+    log = AuditLog(db_path, flush_interval=10.0)
+    for day, risk_level, version in [(1, "Low Risk", "v1"), (2, "High Risk", "v1"),
+                                     (3, "High Risk", "v2"), (4, "Low Risk", "v2")]:
+        ts = datetime(2026, 1, day, 12).timestamp()
+        monkeypatch.setattr(audit_log.time, "time", lambda ts=ts: ts)
+        record(log, risk_level=risk_level, model_version=version)
+    monkeypatch.undo()
+    log.close()
+
+    def days(**filters):
+        return [r["time"][:10] for r in query(db_path, **filters)]
+
+    assert days() == ["2026-01-04", "2026-01-03", "2026-01-02", "2026-01-01"]
+    assert days(since="2026-01-02", until="2026-01-04") == ["2026-01-03", "2026-01-02"]
+    assert days(risk_level="High Risk") == ["2026-01-03", "2026-01-02"]
+    assert days(model_version="v2", risk_level="Low Risk") == ["2026-01-04"]
+    assert days(limit=1) == ["2026-01-04"]
+
+
+def test_full_queue_refuses_instead_of_dropping(db_path):
+    log = StalledAuditLog(db_path, max_queue=1, put_timeout=0.05, flush_interval=0.01)
+    record(log)
+    wait_for(lambda: log.stats()["queued"] == 0)
+    record(log)
+
+    with pytest.raises(AuditUnavailable):
+        record(log)
+    assert log.rejected == 1
+    assert log.dropped == 0
+    assert log.healthy()
+
+    log.resume.set()
+    log.close()
+    assert log.written == 2
+
+
+def test_unflushed_records_at_close_mark_the_log_unhealthy(db_path):
+    log = StalledAuditLog(db_path, max_queue=1, flush_interval=0.01)
+    record(log)
+    wait_for(lambda: log.stats()["queued"] == 0)
+    record(log)
+
+    log.close(timeout=0.05)
+
+    assert log.dropped == 1
+    assert not log.stats()["healthy"]
+    log.resume.set()
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/predict", PREDICT_BODY),
+    ("/analyze", {"health_data": PREDICT_BODY}),
+])
+def test_scores_are_refused_when_audit_is_unavailable(backend_api, monkeypatch, path, body):
+    async def refuse(*args, **kwargs):
+        raise AuditUnavailable("Audit queue is full")
+
+    monkeypatch.setattr(backend_api.audit_log, "record", refuse)
+    response = TestClient(backend_api.app).post(path, json=body)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(backend_api.audit_log.retry_after())
+    assert "risk_percentage" not in response.json()
+
+
+def test_health_reports_dropped_records(backend_api, monkeypatch):
+    client = TestClient(backend_api.app)
+    assert client.get("/health").json()["status"] == "healthy"
+
+    monkeypatch.setattr(backend_api.audit_log, "dropped", 3)
+    health = client.get("/health").json()
+    assert health["status"] == "unhealthy"
+    assert health["audit_log"]["healthy"] is False
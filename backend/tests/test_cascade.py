@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from cascade import CascadeModel, fit_band
+
+FAST = np.linspace(0.0, 1.0, 11)
+
+
+def full_with_errors(bad_indices, error=0.2):
+    full = FAST.copy()
+    full[list(bad_indices)] += error
+    return full
+
+
+def test_accurate_fast_model_escalates_nothing():
+    low, high = fit_band(FAST, FAST, max_error=0.05)
+    assert (low, high) == (1.0, 0.0)
+    assert low > high
+
+
+def test_band_spans_the_inaccurate_middle():
+    low, high = fit_band(FAST, full_with_errors([4, 5, 6]), max_error=0.05)
+    assert (low, high) == (FAST[4], FAST[6])
+
+
+def test_single_bad_row_gives_a_point_band():
+    low, high = fit_band(FAST, full_with_errors([3]), max_error=0.05)
+    assert low == high == FAST[3]
+
+
+def test_all_rows_bad_escalates_everything():
+    low, high = fit_band(FAST, FAST + 0.5, max_error=0.05)
+    assert (low, high) == (FAST[0], FAST[-1])
+
+
+def test_outliers_at_the_edges_are_tolerated():
+    # 2 allowed in total, 1 per side: the extreme bad rows stay outside the band
+    full = full_with_errors([0, 5, 10])
+    low, high = fit_band(FAST, full, max_error=0.05, outlier_rate=0.2)
+    assert (low, high) == (FAST[5], FAST[5])
+
+    # Without the tolerance the band covers them
+    assert fit_band(FAST, full, max_error=0.05) == (FAST[0], FAST[-1])
+
+
+def test_band_is_independent_of_row_order():
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(FAST))
+    full = full_with_errors([4, 5, 6])
+    assert fit_band(FAST[order], full[order], max_error=0.05) == fit_band(FAST, full, max_error=0.05)
+
+
+class ConstantRegressor:
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=float)
+
+    def predict(self, X):
+        return self.values[: len(X)].copy()
+
+
+class ConstantClassifier:
+    classes_ = np.array([0, 1])
+    n_features_in_ = 1
+
+    def __init__(self, positive):
+        self.positive = positive
+        self.rows = 0
+
+    def predict_proba(self, X):
+        self.rows += len(X)
+        return np.column_stack([np.full(len(X), 1 - self.positive), np.full(len(X), self.positive)])
+
+
+@pytest.mark.parametrize("low, high, escalated", [
+    (1.0, 0.0, 0),    # empty band from fit_band
+    (0.3, 0.3, 1),    # point band
+    (0.0, 1.0, 4),
+])
+def test_cascade_escalates_only_rows_inside_the_band(low, high, escalated):
+    full = ConstantClassifier(0.5)
+    cascade = CascadeModel(ConstantRegressor([0.1, 0.3, 0.8, 1.2]), full, low, high)
+
+    proba = cascade.predict_proba(np.zeros((4, 1)))
+
+    assert full.rows == escalated
+    assert cascade.stats()["escalated"] == escalated
+    assert np.allclose(proba.sum(axis=1), 1.0)
+    # Fast outputs are clipped to [0, 1]
+    assert proba[3, 1] == (0.5 if escalated == 4 else 1.0)
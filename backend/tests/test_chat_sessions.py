@@ -0,0 +1,137 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import chat_sessions
+from chat_sessions import SUMMARY_MAX_CHARS, ChatSessionStore, estimate_tokens
+from conftest import StubClaude
+
+
+def fill(store, session, turns, size=40):
+    for i in range(turns):
+        store.record_turn(session, f"question {i} " + "q" * size, f"answer {i} " + "a" * size)
+
+
+def message_tokens(messages):
+    return sum(estimate_tokens(m["content"]) for m in messages)
+
+
+def test_unknown_session_id_gets_a_server_id():
+    store = ChatSessionStore()
+    session = store.get_or_create("chosen-by-client")
+    assert session.session_id != "chosen-by-client"
+    assert store.get_or_create(session.session_id) is session
+
+
+def test_build_messages_keeps_newest_turns_within_budget():
+    store = ChatSessionStore(max_turns=50)
+    session = store.get_or_create(None)
+    fill(store, session, 20)
+
+    messages = store.build_messages(session, "latest question", token_budget=200)
+
+    assert message_tokens(messages) <= 200
+    assert messages[-1]["role"] == "user"
+    assert messages[-1]["content"].endswith("latest question")
+    # Newest turns are verbatim, oldest ones only appear in the summary
+    assert messages[-2]["content"].startswith("answer 19")
+    assert "EARLIER IN THIS CONVERSATION" in messages[-1]["content"]
+    assert not any(m["content"].startswith("question 0 ") for m in messages)
+
+
+def test_build_messages_without_history_is_just_the_prompt():
+    store = ChatSessionStore()
+    session = store.get_or_create(None)
+    assert store.build_messages(session, "hello", token_budget=100) == [{"role": "user", "content": "hello"}]
+
+
+def test_old_turns_fold_into_summary():
+    store = ChatSessionStore(max_turns=3)
+    session = store.get_or_create(None)
+    fill(store, session, 5)
+
+    assert len(session.turns) == 3
+    assert session.turns[0][0].startswith("question 2")
+    assert "question 0" in session.summary and "question 1" in session.summary
+
+    fill(store, session, 100, size=100)
+    assert len(session.summary) <= SUMMARY_MAX_CHARS
+
+
+def test_ttl_expires_idle_sessions(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(chat_sessions.time, "monotonic", lambda: now[0])
+    store = ChatSessionStore(ttl_seconds=60)
+    session = store.get_or_create(None)
+    fill(store, session, 1)
+
+    now[0] += 30
+    assert store.get_or_create(session.session_id) is session
+    now[0] += 61
+    assert store.get_or_create(session.session_id) is not session
+    assert store.stats()["sessions"] == 1
+
+
+def test_lru_evicts_least_recently_used():
+    store = ChatSessionStore(max_sessions=2)
+    first = store.get_or_create(None)
+    second = store.get_or_create(None)
+    store.get_or_create(first.session_id)
+    store.get_or_create(None)
+
+    assert store.get_or_create(first.session_id) is first
+    assert store.get_or_create(second.session_id) is not second
+
+
+def test_byte_cap_evicts_then_trims():
+    # Cap sits above SUMMARY_MAX_CHARS so a fully folded session always fits
+    store = ChatSessionStore(max_total_bytes=1500, max_turns=100)
+    old = store.get_or_create(None)
+    fill(store, old, 3, size=200)
+    new = store.get_or_create(None)
+    fill(store, new, 3, size=200)
+
+    assert store.stats()["total_bytes"] <= 1500
+    assert store.get_or_create(old.session_id) is not old
+
+    # A single session over the cap is trimmed rather than evicted
+    fill(store, new, 20, size=200)
+    assert store.stats()["total_bytes"] <= 1500
+    assert new.summary
+
+
+@pytest.fixture
+def chat_api(backend_api, monkeypatch):
+    stub = StubClaude()
+    store = ChatSessionStore()
+    monkeypatch.setattr(backend_api, "claude_client", stub)
+    monkeypatch.setattr(backend_api, "claude_available", True)
+    monkeypatch.setattr(backend_api, "chat_sessions", store)
+    return TestClient(backend_api.app), stub, store, backend_api
+
+
+def test_chat_sends_cache_marked_system_block_and_history(chat_api):
+    client, stub, store, api = chat_api
+
+    first = client.post("/chat", json={"message": "What should I eat?"}).json()
+    assert first["response"] == "Stub reply"
+    second = client.post("/chat", json={"message": "And for dinner?", "session_id": first["session_id"]}).json()
+    assert second["session_id"] == first["session_id"]
+
+    call = stub.calls[-1]
+    assert call["system"] == [
+        {"type": "text", "text": api.CHAT_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+    ]
+    # The earlier exchange is replayed before the new message
+    assert [m["role"] for m in call["messages"]] == ["user", "assistant", "user"]
+    assert call["messages"][1]["content"] == "Stub reply"
+
+
+def test_fallback_chat_does_not_create_sessions(chat_api, monkeypatch):
+    client, stub, store, api = chat_api
+    monkeypatch.setattr(api, "claude_available", False)
+
+    reply = client.post("/chat", json={"message": "hi", "session_id": "abc"}).json()
+
+    assert reply["session_id"] == "abc"
+    assert store.stats()["sessions"] == 0
+    assert stub.calls == []
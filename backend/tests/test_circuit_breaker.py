@@ -0,0 +1,199 @@
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from chat_sessions import ChatSessionStore
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from conftest import StubClaude, repo_dir
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_breaker(clock, **kwargs):
+    params = dict(window_size=10, min_calls=4, failure_rate=0.5, slow_call_seconds=5.0, open_seconds=30.0)
+    params.update(kwargs)
+    return CircuitBreaker("test", clock=clock, **params)
+
+
+def trip(breaker):
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_opens_on_failure_rate(clock):
+    breaker = make_breaker(clock)
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.snapshot()["rejected_calls"] == 1
+
+
+def test_opens_on_slow_calls(clock):
+    breaker = make_breaker(clock)
+    for _ in range(2):
+        breaker.record_success(0.1)
+    for _ in range(2):
+        breaker.record_success(6.0)
+    assert breaker.state == OPEN
+
+
+def test_stays_closed_below_min_calls(clock):
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_a_single_probe_through(clock):
+    breaker = make_breaker(clock)
+    trip(breaker)
+    clock.now += 29
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == 1
+
+    clock.now += 1
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()
+
+
+def test_probe_success_closes(clock):
+    breaker = make_breaker(clock)
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.retry_after() == 0
+    assert breaker.snapshot()["recent_calls"] == 0
+
+
+def test_probe_failure_reopens(clock):
+    breaker = make_breaker(clock)
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.retry_after() == 30
+    assert breaker.snapshot()["times_opened"] == 2
+
+
+def test_outcomes_while_open_are_ignored(clock):
+    breaker = make_breaker(clock)
+    trip(breaker)
+    clock.now += 20
+    # Stragglers from before the trip neither extend the open interval
+    # nor land in the window used once the breaker closes again
+    breaker.record_failure()
+    breaker.record_success(6.0)
+    assert breaker.retry_after() == 10
+    assert breaker.snapshot()["recent_calls"] == breaker.min_calls
+
+    clock.now += 10
+    assert breaker.allow_request()
+
+
+class FaultyUpstream:
+    """Stands in for requests.post against the Messages API; always overloaded"""
+
+    status_code = 529
+    text = '{"type": "error", "error": {"type": "overloaded_error"}}'
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, url, **kwargs):
+        self.calls += 1
+        return self
+
+
+@pytest.fixture
+def flask_server(clock, monkeypatch):
+    if repo_dir not in sys.path:
+        sys.path.insert(0, repo_dir)
+    import backend_server
+
+    breaker = make_breaker(clock)
+    upstream = FaultyUpstream()
+    monkeypatch.setattr(backend_server, "claude_breaker", breaker)
+    monkeypatch.setattr(backend_server.requests, "post", upstream)
+    return backend_server.app.test_client(), breaker, upstream
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/chat", {"message": "hi"}),
+    ("/plan", {"plan_type": "diet", "health_data": {}}),
+])
+def test_server_returns_503_with_retry_after_while_open(flask_server, clock, path, body):
+    client, breaker, upstream = flask_server
+    # Upstream 529s trip the breaker through the real call path
+    for _ in range(breaker.min_calls):
+        assert client.post(path, json=body).status_code == 529
+    assert breaker.state == OPEN
+    clock.now += 12
+
+    response = client.post(path, json=body)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "18"
+    assert response.get_json()["retry_after"] == 18
+    assert upstream.calls == breaker.min_calls
+
+PROFILE = {
+    "age": 50, "sex": "Male", "bmi": 25.0, "smoking": "No", "physical_activity": "Yes",
+    "alcohol": "No", "general_health": "Good", "sleep_hours": 7, "diabetes": "No",
+}
+
+
+@pytest.fixture
+def failing_claude(backend_api, clock, monkeypatch):
+    """backend_api wired to a Claude stub that fails every call"""
+    stub = StubClaude(error=RuntimeError("529 Overloaded"))
+    breaker = make_breaker(clock)
+    monkeypatch.setattr(backend_api, "claude_client", stub)
+    monkeypatch.setattr(backend_api, "claude_available", True)
+    monkeypatch.setattr(backend_api, "claude_breaker", breaker)
+    monkeypatch.setattr(backend_api, "chat_sessions", ChatSessionStore())
+    return TestClient(backend_api.app), stub, breaker
+
+
+def test_upstream_faults_trip_the_api_breaker_and_fallbacks_skip_claude(failing_claude):
+    client, stub, breaker = failing_claude
+
+    for _ in range(breaker.min_calls):
+        assert client.post("/chat", json={"message": "hi there"}).status_code == 200
+    assert len(stub.calls) == breaker.min_calls
+    assert breaker.state == OPEN
+
+    chat = client.post("/chat", json={"message": "hi there"})
+    plan = client.post("/plan", json={"plan_type": "diet", "health_data": PROFILE})
+    predict = client.post("/predict", json=PROFILE)
+
+    assert chat.status_code == 200 and chat.json()["response"]
+    assert plan.status_code == 200
+    assert plan.headers["content-location"] == "/plan/diet?age=50&sex=Male"
+    assert predict.status_code == 200
+    assert predict.json()["risk_percentage"] == 25.0
+    assert len(stub.calls) == breaker.min_calls
+
+    circuit = client.get("/health").json()["claude_circuit"]
+    assert circuit["state"] == OPEN
+    assert circuit["rejected_calls"] == 3
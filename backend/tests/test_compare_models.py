@@ -0,0 +1,21 @@
+from compare_models import dominates
+
+
+def result(score, p95, rss):
+    return {"score": score, "single_row_p95_ms": p95, "rss_bytes": rss}
+
+
+def test_dominates_on_all_three_axes():
+    assert dominates(result(0.9, 5.0, 100), result(0.8, 6.0, 200))
+    assert not dominates(result(0.9, 5.0, 300), result(0.8, 6.0, 200))
+    assert not dominates(result(0.9, 5.0, 100), result(0.9, 5.0, 100))
+
+
+def test_unmeasured_memory_is_not_the_best_memory():
+    unmeasured = result(0.9, 5.0, None)
+    measured = result(0.9, 5.0, 100)
+    # Equal on what both have, so neither pushes the other off the front
+    assert not dominates(unmeasured, measured)
+    assert not dominates(measured, unmeasured)
+    # AUC and latency still decide when memory is unknown
+    assert dominates(result(0.95, 4.0, None), measured)
@@ -0,0 +1,53 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.ensemble import GradientBoostingClassifier
+
+from debug_tools import model_footprint
+
+
+def test_footprint_counts_trees_inside_object_arrays():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 5))
+    y = (X[:, 0] > 0).astype(int)
+    model = GradientBoostingClassifier(n_estimators=20, random_state=0).fit(X, y)
+
+    one_tree = model_footprint(model.estimators_[0, 0])
+    assert one_tree > 0
+    assert model_footprint(model) >= model.estimators_.size * one_tree
+
+
+def test_memory_report_always_stops_tracing(monkeypatch):
+    import debug_tools
+
+    def interrupted(seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(debug_tools.time, "sleep", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        debug_tools.memory_report(1, 5, {})
+    assert not tracemalloc.is_tracing()
+
+    monkeypatch.undo()
+    report = debug_tools.memory_report(0, 5, {})
+    assert report["window_seconds"] == 0
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.parametrize("path", [
+    "/debug/memory?seconds=-1",
+    "/debug/memory?seconds=3600",
+    "/debug/memory?top=0",
+    "/debug/profile?seconds=-1",
+    "/debug/profile?interval_ms=0",
+])
+def test_debug_endpoints_reject_out_of_range_params(backend_api, monkeypatch, path):
+    monkeypatch.setattr(backend_api, "DEBUG_TOKEN", "secret")
+    client = TestClient(backend_api.app)
+
+    response = client.get(path, headers={"X-Debug-Token": "secret"})
+
+    assert response.status_code == 422
+    assert not tracemalloc.is_tracing()
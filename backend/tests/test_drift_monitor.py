@@ -0,0 +1,95 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from drift_monitor import (MAX_CATEGORIES, OTHER, CategoricalStats, DriftMonitor, NumericStats,
+                           baseline_from_dataframe, binned_ks, population_stability_index)
+
+
+def profiles(n, seed=0, age_shift=0.0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "age": rng.normal(55 + age_shift, 12, n).round(),
+        "bmi": rng.normal(27, 5, n),
+        "sleep_hours": rng.integers(4, 10, n),
+        "sex": rng.choice(["Male", "Female"], n),
+        "smoking": rng.choice(["Yes", "No"], n, p=[0.3, 0.7]),
+    })
+
+
+def test_welford_matches_numpy():
+    values = np.random.default_rng(1).normal(40, 15, 5000)
+    stats = NumericStats([])
+    for x in values:
+        stats.update(float(x))
+
+    assert stats.n == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-9)
+    assert stats.std() == pytest.approx(values.std(ddof=1), rel=1e-9)
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+
+def test_welford_single_value_has_zero_std():
+    stats = NumericStats([])
+    stats.update(3.0)
+    assert stats.std() == 0.0
+
+
+def test_psi_and_ks_on_known_distributions():
+    assert population_stability_index([0.25] * 4, [0.25] * 4) == 0.0
+    assert binned_ks([0.25] * 4, [0.25] * 4) == 0.0
+
+    expected = 0.4 * math.log(0.9 / 0.5) + (-0.4) * math.log(0.1 / 0.5)
+    assert population_stability_index([0.5, 0.5], [0.9, 0.1]) == pytest.approx(expected)
+    assert binned_ks([0.5, 0.5], [0.9, 0.1]) == pytest.approx(0.4)
+    # Empty bins are floored instead of producing inf
+    assert math.isfinite(population_stability_index([0.5, 0.5], [1.0, 0.0]))
+
+
+def test_category_cap_includes_other():
+    stats = CategoricalStats()
+    for i in range(MAX_CATEGORIES * 2):
+        stats.update(f"value-{i}")
+
+    assert len(stats.counts) == MAX_CATEGORIES
+    assert stats.counts[OTHER] == MAX_CATEGORIES + 1
+    assert sum(stats.counts.values()) == stats.n
+
+
+def test_no_verdict_before_min_observations():
+    monitor = DriftMonitor(baseline_from_dataframe(profiles(5000)), min_observations=100)
+    monitor.update({"age": 95, "bmi": 60.0, "sleep_hours": 2, "sex": "Male", "smoking": "Yes"})
+
+    report = monitor.report()
+    assert report["overall_status"] == "insufficient_data"
+    assert report["max_psi"] is None
+    assert report["fields"]["age"]["status"] == "insufficient_data"
+    assert report["fields"]["age"]["psi"] is None
+    assert report["fields"]["sex"]["status"] == "insufficient_data"
+
+
+def test_stable_and_drifted_streams():
+    baseline = baseline_from_dataframe(profiles(5000))
+
+    stable = DriftMonitor(baseline, min_observations=100)
+    for record in profiles(2000, seed=1).to_dict("records"):
+        stable.update(record)
+    assert stable.report()["overall_status"] == "stable"
+
+    drifted = DriftMonitor(baseline, min_observations=100)
+    for record in profiles(2000, seed=1, age_shift=20).to_dict("records"):
+        drifted.update(record)
+    report = drifted.report()
+    assert report["fields"]["age"]["status"] == "significant_drift"
+    assert report["fields"]["age"]["ks"] > 0.4
+    assert report["fields"]["bmi"]["status"] == "stable"
+
+
+def test_without_baseline():
+    monitor = DriftMonitor(None, min_observations=1)
+    monitor.update({"age": 50})
+    report = monitor.report()
+    assert report["overall_status"] == "no_baseline"
+    assert report["fields"]["age"]["status"] == "no_baseline"
@@ -0,0 +1,106 @@
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from plan_responses import PlanEntry, _etag_matches, choose_encoding, fallback_diet_plan
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", "identity"),
+    ("gzip, deflate", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+    ("gzip;q=0", "identity"),
+    ("*", "gzip"),
+    ("*, gzip;q=0", "identity"),
+    ("deflate", "identity"),
+    ("gzip;q=oops", "identity"),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header, {"identity": None, "gzip": None}) == expected
+
+
+def test_choose_encoding_prefers_brotli_when_available():
+    available = {"identity": None, "gzip": None, "br": None}
+    assert choose_encoding("gzip, br", available) == "br"
+    assert choose_encoding("gzip, br;q=0", available) == "gzip"
+
+
+@pytest.mark.parametrize("header, expected", [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"nope", "abc-gz"', True),
+    ("*", True),
+    ('"nope"', False),
+    ("abc", False),
+])
+def test_etag_matching(header, expected):
+    assert _etag_matches(header, ['"abc"', '"abc-gz"']) is expected
+
+
+def test_entry_etags_differ_per_encoding():
+    entry = PlanEntry("plan text")
+    body, etag = entry.bodies["identity"]
+    gz_body, gz_etag = entry.bodies["gzip"]
+    assert etag != gz_etag
+    assert gzip.decompress(gz_body) == body
+    assert json.loads(body) == {"plan": "plan text"}
+
+
+@pytest.fixture
+def client(backend_api):
+    return TestClient(backend_api.app)
+
+
+def test_get_plan_is_cacheable_and_conditional(client):
+    url = "/plan/diet?age=45&sex=Female"
+    first = client.get(url, headers={"Accept-Encoding": "gzip"})
+
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["cache-control"].startswith("public")
+    assert first.headers["vary"] == "Accept-Encoding"
+    assert first.json() == {"plan": fallback_diet_plan(45, "Female")}
+
+    etag = first.headers["etag"]
+    again = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+
+    identity = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert identity.status_code == 200
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["etag"] != etag
+
+    other = client.get("/plan/diet?age=46&sex=Female", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+
+
+@pytest.mark.parametrize("url, status", [
+    ("/plan/sleep?age=45&sex=Male", 404),
+    ("/plan/diet?age=0&sex=Male", 422),
+    ("/plan/diet?age=45&sex=Other", 422),
+    ("/plan/diet?sex=Male", 422),
+])
+def test_get_plan_validates_domain(client, url, status):
+    assert client.get(url).status_code == status
+
+
+def test_post_plan_ignores_conditionals(client, backend_api, monkeypatch):
+    monkeypatch.setattr(backend_api, "claude_available", False)
+    etag = client.get("/plan/exercise?age=60&sex=Male", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+    response = client.post(
+        "/plan",
+        json={"plan_type": "exercise", "health_data": {"age": 60, "sex": "Male"}},
+        headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "etag" not in response.headers
+    assert "cache-control" not in response.headers
+    assert response.headers["content-location"] == "/plan/exercise?age=60&sex=Male"
+    assert "60-year-old Male" in response.json()["plan"]
@@ -0,0 +1,187 @@
+"""
+Train the distilled fast model for cascade inference and report how it does.
+
+Loads the full forest and scaler from models/ (or the reduced model named
+by feature_schema.json, when select_features.py has exported one), rebuilds the notebook's
+train/test split from final_heart_dataset.csv, fits a shallow gradient
+boosted regressor on the forest's probabilities and picks the uncertainty
+band on a calibration slice of the training data. The held-out test split
+is used for the report (escalation rate, speedup, max probability error).
+The cascade is only installed (cascade_config.json written) when it beats
+the full model on single-row latency, the /predict case; otherwise the
+report is saved and any existing cascade is moved aside.
+
+Usage:
+    python train_cascade.py
+    python train_cascade.py --max-error 0.03 --features age,sleep_hours,...
+"""
+
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.model_selection import train_test_split
+
+from cascade import MIN_SPEEDUP, CascadeModel, file_sha256, fit_band
+from feature_schema import load_schema
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+models_dir = os.path.join(base_dir, 'models')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Distill the forest into a fast cascade model")
+    parser.add_argument('--data', default=os.path.join(models_dir, 'final_heart_dataset.csv'))
+    parser.add_argument('--model', default='',
+                        help="Full model (default: schema model or final_best_model.pkl)")
+    parser.add_argument('--scaler', default='',
+                        help="Scaler (default: schema scaler or feature_scaler.pkl)")
+    parser.add_argument('--target', default='heart_disease')
+    parser.add_argument('--features', default='',
+                        help="Comma separated feature columns (default: all but target)")
+    parser.add_argument('--max-error', type=float, default=0.05,
+                        help="Max |fast - full| probability allowed outside the band")
+    parser.add_argument('--outlier-rate', type=float, default=0.005,
+                        help="Share of calibration rows allowed over --max-error outside the band")
+    parser.add_argument('--band', default='',
+                        help="Fixed band 'low,high' instead of fitting one")
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--max-depth', type=int, default=3)
+    parser.add_argument('--out-dir', default=models_dir)
+    return parser.parse_args()
+
+
+def time_per_row(predict, X, single_rows=200):
+    """Batch and single-row latency of a predict_proba callable"""
+    start = time.perf_counter()
+    predict(X)
+    batch = (time.perf_counter() - start) / len(X)
+
+    rows = X[:single_rows]
+    start = time.perf_counter()
+    for row in rows:
+        predict(row.reshape(1, -1))
+    single = (time.perf_counter() - start) / len(rows)
+    return batch, single
+
+
+def main():
+    args = parse_args()
+
+    # Follow the exported feature schema unless told otherwise
+    schema = load_schema(models_dir)
+    if schema is not None and not (args.model or args.features):
+        args.model = os.path.join(models_dir, schema.schema['model_file'])
+        args.scaler = os.path.join(models_dir, schema.schema['scaler_file'])
+        args.features = ','.join(schema.features)
+        print(f"[CASCADE] Using feature schema {schema.version}")
+    args.model = args.model or os.path.join(models_dir, 'final_best_model.pkl')
+    args.scaler = args.scaler or os.path.join(models_dir, 'feature_scaler.pkl')
+
+    df = pd.read_csv(args.data)
+    if args.features:
+        X = df[[f.strip() for f in args.features.split(',')]]
+    else:
+        X = df.drop(args.target, axis=1)
+    y = df[args.target]
+
+    full_model = joblib.load(args.model)
+    scaler = joblib.load(args.scaler)
+    X_scaled = scaler.transform(X.values)
+
+    # Same split as heart_model_training.ipynb
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_scaled, y,
+        test_size=0.2,
+        random_state=42,
+        stratify=y
+    )
+    # Hold back part of the training data to fit the band
+    X_fit, X_cal = train_test_split(X_train, test_size=0.2, random_state=42)
+
+    print(f"[CASCADE] Scoring {len(X_train)} training rows with the full model")
+    soft_fit = full_model.predict_proba(X_fit)[:, 1]
+    soft_cal = full_model.predict_proba(X_cal)[:, 1]
+
+    print("[CASCADE] Training distilled model")
+    fast_model = GradientBoostingRegressor(
+        n_estimators=args.n_estimators,
+        max_depth=args.max_depth,
+        learning_rate=0.1,
+        subsample=0.9,
+        random_state=42
+    )
+    fast_model.fit(X_fit, soft_fit)
+
+    if args.band:
+        low, high = (float(v) for v in args.band.split(','))
+    else:
+        fast_cal = np.clip(fast_model.predict(X_cal), 0.0, 1.0)
+        low, high = fit_band(fast_cal, soft_cal, args.max_error, args.outlier_rate)
+    print(f"[CASCADE] Uncertainty band: [{low:.4f}, {high:.4f}]")
+
+    # Held-out report
+    cascade = CascadeModel(fast_model, full_model, low, high)
+    full_test = full_model.predict_proba(X_test)[:, 1]
+    cascade_test = cascade.predict_proba(X_test)[:, 1]
+    errors = np.abs(cascade_test - full_test)
+    escalation_rate = cascade.escalated / cascade.rows
+
+    full_batch, full_single = time_per_row(full_model.predict_proba, X_test)
+    cascade_batch, cascade_single = time_per_row(cascade.predict_proba, X_test)
+
+    report = {
+        "test_rows": int(len(X_test)),
+        "band": [low, high],
+        "max_error_target": args.max_error,
+        "escalation_rate": round(escalation_rate, 4),
+        "max_probability_error": float(errors.max()),
+        "mean_probability_error": float(errors.mean()),
+        "decision_agreement": float(np.mean((cascade_test >= 0.5) == (full_test >= 0.5))),
+        "full_accuracy": float(np.mean((full_test >= 0.5) == y_test.values)),
+        "cascade_accuracy": float(np.mean((cascade_test >= 0.5) == y_test.values)),
+        "full_ms_per_row_batch": full_batch * 1000,
+        "cascade_ms_per_row_batch": cascade_batch * 1000,
+        "full_ms_single_row": full_single * 1000,
+        "cascade_ms_single_row": cascade_single * 1000,
+        "speedup_batch": full_batch / cascade_batch,
+        "speedup_single_row": full_single / cascade_single,
+    }
+
+    # Escalating most rows makes the cascade slower than the forest alone
+    report["installed"] = report["speedup_single_row"] > MIN_SPEEDUP
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    config_path = os.path.join(args.out_dir, 'cascade_config.json')
+    if report["installed"]:
+        joblib.dump(fast_model, os.path.join(args.out_dir, 'cascade_fast_model.pkl'))
+        with open(config_path, 'w') as f:
+            json.dump({"low": low, "high": high, "max_error": args.max_error,
+                       "outlier_rate": args.outlier_rate,
+                       "speedup_single_row": report["speedup_single_row"],
+                       # backend_api.py only enables the cascade in front of this exact file
+                       "full_model_file": os.path.basename(args.model),
+                       "full_model_sha256": file_sha256(args.model)}, f, indent=2)
+    elif os.path.exists(config_path):
+        # An older cascade for the same forest would otherwise stay enabled
+        os.replace(config_path, config_path + '.stale')
+    with open(os.path.join(args.out_dir, 'cascade_report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("[CASCADE] ========== REPORT ==========")
+    for key, value in report.items():
+        print(f"[CASCADE] {key}: {value}")
+    if report["installed"]:
+        print(f"[OK] Saved cascade model to {args.out_dir}")
+    else:
+        print(f"[WARNING] Cascade is not faster than the full model "
+              f"(single-row speedup {report['speedup_single_row']:.2f}x), not installed")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,14 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import requests
 import os
+import sys
+import time
 from dotenv import load_dotenv
 
+# Shared helpers live next to the FastAPI backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from circuit_breaker import CircuitBreaker
+
 # Load environment variables
 load_dotenv()
 
@@ -17,11 +23,82 @@ CORS(app)  # Enable CORS for Flutter app
 
 # Claude API Configuration
 CLAUDE_API_KEY = os.getenv('CLAUDE_API_KEY', '')
+CLAUDE_API_URL = os.getenv('CLAUDE_API_URL', 'https://api.anthropic.com/v1/messages')
+CLAUDE_TIMEOUT = float(os.getenv('CLAUDE_TIMEOUT', '60'))
+
+# Trips on upstream errors or slow calls so requests fail fast while
+# Claude is degraded instead of each waiting up to CLAUDE_TIMEOUT
+claude_breaker = CircuitBreaker(
+    'claude',
+    failure_rate=float(os.getenv('CLAUDE_BREAKER_FAILURE_RATE', '0.5')),
+    slow_call_seconds=float(os.getenv('CLAUDE_BREAKER_SLOW_SECONDS', '20')),
+    open_seconds=float(os.getenv('CLAUDE_BREAKER_OPEN_SECONDS', '30')),
+)
+
+FALLBACK_ANALYSIS = {
+    'risk_percentage': 25.0,
+    'risk_level': 'Low Risk',
+    'top_risk_factors': [{'factor': 'BMI', 'impact': 'Medium'}],
+    'recommendations': [
+        'Maintain a balanced, heart-healthy diet',
+        'Aim for 150 minutes of moderate exercise per week',
+        'Get 7-8 hours of sleep each night',
+    ]
+}
+
+def call_claude(prompt):
+    """POST a single-turn prompt to Claude and record the outcome on the breaker"""
+    start = time.perf_counter()
+    try:
+        response = requests.post(
+            CLAUDE_API_URL,
+            headers={
+                'Content-Type': 'application/json',
+                'x-api-key': CLAUDE_API_KEY,
+                'anthropic-version': '2023-06-01',
+            },
+            json={
+                'model': 'claude-3-5-sonnet-20241022',
+                'max_tokens': 2000,
+                'messages': [
+                    {
+                        'role': 'user',
+                        'content': prompt,
+                    }
+                ],
+            },
+            timeout=CLAUDE_TIMEOUT
+        )
+    except requests.RequestException:
+        claude_breaker.record_failure(time.perf_counter() - start)
+        raise
+
+    duration = time.perf_counter() - start
+    if response.status_code == 429 or response.status_code >= 500:
+        claude_breaker.record_failure(duration)
+    else:
+        claude_breaker.record_success(duration)
+    return response
+
+def circuit_open_response():
+    """Fast-fail response used while the breaker is open"""
+    retry_after = claude_breaker.retry_after()
+    response = jsonify({
+        'error': 'Claude API temporarily unavailable',
+        'retry_after': retry_after
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({'status': 'ok', 'message': 'Backend server is running'})
+    return jsonify({
+        'status': 'ok',
+        'message': 'Backend server is running',
+        'claude_circuit': claude_breaker.snapshot()
+    })
 
 @app.route('/analyze', methods=['POST'])
 def analyze_health():
@@ -30,6 +107,9 @@ def analyze_health():
         data = request.json
         health_data = data.get('health_data', {})
         
+        if not claude_breaker.allow_request():
+            return jsonify(FALLBACK_ANALYSIS)
+        
         prompt = f'''
 You are Dr. HeartAI, a cardiovascular health expert. Analyze the following health profile and provide a comprehensive risk assessment:
 
@@ -60,25 +140,7 @@ Please provide a JSON response with the following structure:
 Be professional, encouraging, and provide actionable advice. Return ONLY valid JSON, no additional text.
 '''
 
-        response = requests.post(
-            CLAUDE_API_URL,
-            headers={
-                'Content-Type': 'application/json',
-                'x-api-key': CLAUDE_API_KEY,
-                'anthropic-version': '2023-06-01',
-            },
-            json={
-                'model': 'claude-3-5-sonnet-20241022',
-                'max_tokens': 2000,
-                'messages': [
-                    {
-                        'role': 'user',
-                        'content': prompt,
-                    }
-                ],
-            },
-            timeout=60
-        )
+        response = call_claude(prompt)
 
         if response.status_code == 200:
             result = response.json()
@@ -93,9 +155,7 @@ Be professional, encouraging, and provide actionable advice. Return ONLY valid J
             else:
                 # Fallback response
                 return jsonify({
-                    'risk_percentage': 25.0,
-                    'risk_level': 'Low Risk',
-                    'top_risk_factors': [{'factor': 'BMI', 'impact': 'Medium'}],
+                    **FALLBACK_ANALYSIS,
                     'recommendations': content.split('\n')[:5]
                 })
         else:
@@ -115,6 +175,9 @@ def chat():
         message = data.get('message', '')
         user_data = data.get('user_data')
         
+        if not claude_breaker.allow_request():
+            return circuit_open_response()
+        
         context_info = ''
         if user_data:
             context_info = f'''
@@ -138,25 +201,7 @@ User Question: {message}
 Provide a helpful, encouraging, and professional response about heart health, diet, exercise, or general cardiovascular wellness. Be conversational but informative.
 '''
 
-        response = requests.post(
-            CLAUDE_API_URL,
-            headers={
-                'Content-Type': 'application/json',
-                'x-api-key': CLAUDE_API_KEY,
-                'anthropic-version': '2023-06-01',
-            },
-            json={
-                'model': 'claude-3-5-sonnet-20241022',
-                'max_tokens': 2000,
-                'messages': [
-                    {
-                        'role': 'user',
-                        'content': prompt,
-                    }
-                ],
-            },
-            timeout=60
-        )
+        response = call_claude(prompt)
 
         if response.status_code == 200:
             result = response.json()
@@ -178,6 +223,9 @@ def get_plan():
         plan_type = data.get('plan_type')  # 'diet' or 'exercise'
         health_data = data.get('health_data', {})
         
+        if not claude_breaker.allow_request():
+            return circuit_open_response()
+        
         if plan_type == 'diet':
             prompt = f'''
 Create a personalized heart-healthy diet plan for:
@@ -195,25 +243,7 @@ Physical Activity: {health_data.get('physical_activity')}, General Health: {heal
 Provide a safe, progressive exercise routine with specific exercises, duration, frequency, and intensity. Be encouraging and specific.
 '''
 
-        response = requests.post(
-            CLAUDE_API_URL,
-            headers={
-                'Content-Type': 'application/json',
-                'x-api-key': CLAUDE_API_KEY,
-                'anthropic-version': '2023-06-01',
-            },
-            json={
-                'model': 'claude-3-5-sonnet-20241022',
-                'max_tokens': 2000,
-                'messages': [
-                    {
-                        'role': 'user',
-                        'content': prompt,
-                    }
-                ],
-            },
-            timeout=60
-        )
+        response = call_claude(prompt)
 
         if response.status_code == 200:
             result = response.json()
@@ -0,0 +1,81 @@
+"""
+Timing and reporting helpers shared by the benchmark scripts.
+"""
+
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_dir = os.path.join(repo_dir, 'backend')
+
+
+def random_profiles(n: int, seed: int = 42) -> List[Dict]:
+    """Deterministic HealthData-shaped request bodies"""
+    rng = np.random.default_rng(seed)
+    yes_no = np.array(["Yes", "No"])
+    health = np.array(["Excellent", "Very good", "Good", "Fair", "Poor"])
+    return [
+        {
+            "age": int(rng.integers(18, 90)),
+            "sex": "Male" if rng.random() < 0.5 else "Female",
+            "bmi": round(float(rng.normal(27.5, 5.0)), 1),
+            "smoking": str(rng.choice(yes_no, p=[0.2, 0.8])),
+            "physical_activity": str(rng.choice(yes_no, p=[0.7, 0.3])),
+            "alcohol": str(rng.choice(yes_no, p=[0.4, 0.6])),
+            "general_health": str(rng.choice(health)),
+            "sleep_hours": int(rng.integers(4, 11)),
+            "diabetes": str(rng.choice(yes_no, p=[0.15, 0.85])),
+        }
+        for _ in range(n)
+    ]
+
+
+def summarize(seconds: List[float]) -> Dict:
+    """Latency percentiles in milliseconds for a list of durations"""
+    if not seconds:
+        return {"samples": 0}
+    ms = np.asarray(seconds) * 1000.0
+    return {
+        "samples": int(len(ms)),
+        "mean_ms": round(float(ms.mean()), 4),
+        "min_ms": round(float(ms.min()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "max_ms": round(float(ms.max()), 4),
+    }
+
+
+def time_call(fn: Callable, min_seconds: float = 0.5, min_runs: int = 5, max_runs: int = 1000) -> Dict:
+    """Call fn repeatedly (after one warm-up call) and summarize per-call time"""
+    fn()
+    durations = []
+    deadline = time.perf_counter() + min_seconds
+    while len(durations) < max_runs and (len(durations) < min_runs or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+
+def environment() -> Dict:
+    """Host and revision the results were measured on"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=repo_dir, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
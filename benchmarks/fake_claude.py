@@ -0,0 +1,198 @@
+"""
+Deterministic stand-in for the Claude Messages API.
+
+Answers POST /v1/messages with a canned response after an injected delay,
+so the backends can be load-tested without network access or API spend.
+Delays are drawn from a seeded RNG (base latency, uniform jitter and an
+occasional tail spike), so runs with the same settings see the same
+latency distribution. Every Nth request can be answered with a 529 to
+exercise the circuit breakers.
+
+Prompts that ask for JSON get a valid risk-assessment object back, so
+/analyze parses it the same way it parses a real reply.
+
+Usage:
+    python fake_claude.py --port 8090 --latency-ms 300 --jitter-ms 100
+    CLAUDE_API_URL=http://127.0.0.1:8090/v1/messages python backend_server.py
+    CLAUDE_BASE_URL=http://127.0.0.1:8090 CLAUDE_API_KEY=bench uvicorn backend_api:app
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+ANALYSIS_REPLY = {
+    "risk_percentage": 32.5,
+    "risk_level": "Medium Risk",
+    "top_risk_factors": [
+        {"factor": "BMI", "impact": "Medium"},
+        {"factor": "Sleep duration", "impact": "Low"},
+    ],
+    "recommendations": [
+        "Aim for 150 minutes of moderate exercise per week",
+        "Keep a consistent 7-8 hour sleep schedule",
+        "Favour vegetables, whole grains and lean protein",
+    ],
+}
+
+TEXT_REPLY = (
+    "Thanks for sharing. A heart-healthy routine combines regular moderate "
+    "exercise, a diet rich in vegetables and whole grains, good sleep and "
+    "not smoking. "
+)
+
+
+class FakeClaude:
+    """Threaded fake Messages API server; start() returns once it is listening"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 300,
+                 jitter_ms: float = 100, spike_every: int = 50, spike_ms: float = 1500,
+                 error_every: int = 0, output_words: int = 120, seed: int = 42):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.spike_every = spike_every
+        self.spike_ms = spike_ms
+        self.error_every = error_every
+        self.output_words = output_words
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self._server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeClaude":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-claude", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve(self):
+        """Run in the foreground until interrupted"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def next_call(self):
+        """(delay in seconds, fail?) for the next request, in arrival order"""
+        with self._lock:
+            self.requests += 1
+            n = self.requests
+            delay = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+            if self.spike_every and n % self.spike_every == 0:
+                delay += self.spike_ms
+            fail = bool(self.error_every) and n % self.error_every == 0
+            if fail:
+                self.errors += 1
+        return max(delay, 0.0) / 1000.0, fail
+
+    def reply(self, body: Dict) -> Dict:
+        prompt = _last_user_text(body)
+        if "json" in prompt.lower():
+            text = json.dumps(ANALYSIS_REPLY)
+        else:
+            words = TEXT_REPLY.split()
+            text = " ".join(words[i % len(words)] for i in range(self.output_words))
+        return {
+            "id": f"msg_fake_{self.requests:08d}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": max(1, len(prompt) // 4), "output_tokens": max(1, len(text) // 4)},
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors}
+
+
+def _last_user_text(body: Dict) -> str:
+    for message in reversed(body.get("messages", [])):
+        if message.get("role") != "user":
+            continue
+        content = message.get("content", "")
+        if isinstance(content, list):
+            return " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+        return str(content)
+    return ""
+
+
+def _handler_for(fake: FakeClaude):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                return self._send(400, {"type": "error", "error": {"type": "invalid_request_error", "message": "Invalid JSON"}})
+            if not self.path.rstrip("/").endswith("/v1/messages"):
+                return self._send(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+
+            delay, fail = fake.next_call()
+            time.sleep(delay)
+            if fail:
+                return self._send(529, {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}})
+            self._send(200, fake.reply(body))
+
+        def do_GET(self):
+            if self.path == "/stats":
+                return self._send(200, fake.stats())
+            self._send(404, {"error": "not found"})
+
+        def _send(self, status: int, payload: Dict):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Claude Messages API for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--spike-every", type=int, default=50, help="Add --spike-ms to every Nth call (0 = never)")
+    parser.add_argument("--spike-ms", type=float, default=1500)
+    parser.add_argument("--error-every", type=int, default=0, help="Answer every Nth call with 529 (0 = never)")
+    parser.add_argument("--output-words", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    fake = FakeClaude(args.host, args.port, args.latency_ms, args.jitter_ms, args.spike_every,
+                      args.spike_ms, args.error_every, args.output_words, args.seed)
+    print(f"[FAKE] Claude stub on {fake.url}/v1/messages "
+          f"({args.latency_ms:.0f}±{args.jitter_ms:.0f} ms)")
+    fake.serve()
+
+
+if __name__ == "__main__":
+    main()
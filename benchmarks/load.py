@@ -0,0 +1,283 @@
+"""
+Endpoint load tests for backend_api.py (FastAPI) and backend_server.py (Flask).
+
+Starts the fake Claude server in-process, launches each backend as a
+subprocess on a free port pointed at it, waits for /health, then drives
+every endpoint in turn with a fixed number of closed-loop clients (each
+sends its next request as soon as the previous one returns) over
+keep-alive connections. Requests made during the warm-up window are not
+counted.
+
+Reported per endpoint: throughput, latency percentiles, status counts,
+error rate (non-2xx or connection failure) and Claude calls per request.
+Requests shed by admission control (503) count as errors.
+
+/chat clients act like the app: each reuses the session_id the server
+returned, so history assembly grows with the conversation, and starts a
+new conversation every CHAT_TURNS_PER_SESSION turns.
+
+backend_server.py has no /predict route, so only /analyze, /chat and
+/plan are exercised there.
+
+Usage:
+    python load.py
+    python load.py --targets api --duration 30 --concurrency 16
+    python load.py --claude-latency-ms 800 --claude-error-every 10
+"""
+
+import argparse
+import gzip
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+from bench_common import backend_dir, random_profiles, repo_dir, summarize
+from fake_claude import FakeClaude
+
+TARGET_ENDPOINTS = {
+    "api": ["/predict", "/analyze", "/chat", "/plan"],
+    "server": ["/analyze", "/chat", "/plan"],
+}
+
+CHAT_MESSAGES = [
+    "How can I lower my blood pressure?",
+    "What should I eat for breakfast to help my heart?",
+    "Is my sleep schedule affecting my heart health?",
+    "Can you give me an analysis of my risk factors?",
+]
+CHAT_TURNS_PER_SESSION = 10
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ServerProcess:
+    """A backend running in a subprocess, with its output captured to a log file"""
+
+    def __init__(self, name: str, cmd: List[str], cwd: str, env: Dict, port: int):
+        self.name = name
+        self.cmd = cmd
+        self.cwd = cwd
+        self.env = env
+        self.port = port
+        self.log = tempfile.NamedTemporaryFile(prefix=f"bench-{name}-", suffix=".log", delete=False)
+        self.proc = None
+
+    def start(self, timeout: float = 120.0):
+        self.proc = subprocess.Popen(self.cmd, cwd=self.cwd, env=self.env,
+                                     stdout=self.log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                break
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=2)
+                conn.request("GET", "/health")
+                if conn.getresponse().status == 200:
+                    return
+            except (OSError, http.client.HTTPException):
+                pass
+            time.sleep(0.25)
+        self.stop()
+        raise RuntimeError(f"{self.name} did not become healthy; log: {self.log.name}\n{self.tail()}")
+
+    def stop(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        self.log.close()
+
+    def tail(self, lines: int = 20) -> str:
+        with open(self.log.name, errors="replace") as f:
+            return "".join(f.readlines()[-lines:])
+
+
+def start_target(target: str, claude_url: str) -> ServerProcess:
+    port = free_port()
+    env = dict(os.environ)
+    env["CLAUDE_API_KEY"] = "bench-key"
+    env["PYTHONUNBUFFERED"] = "1"
+    if target == "api":
+        env["CLAUDE_BASE_URL"] = claude_url
+        env["AUDIT_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-audit-"), "audit.db")
+        cmd = [sys.executable, "-m", "uvicorn", "backend_api:app",
+               "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+        cwd = backend_dir
+    else:
+        env["CLAUDE_API_URL"] = f"{claude_url}/v1/messages"
+        cmd = [sys.executable, "-c",
+               "import backend_server; "
+               f"backend_server.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+        cwd = repo_dir
+    server = ServerProcess(target, cmd, cwd, env, port)
+    server.start()
+    return server
+
+
+def request_bodies(path: str, count: int = 256) -> List[bytes]:
+    """Deterministic request bodies for one endpoint"""
+    bodies = []
+    for i, profile in enumerate(random_profiles(count, seed=7)):
+        if path == "/predict":
+            body = profile
+        elif path == "/analyze":
+            body = {"health_data": profile}
+        elif path == "/chat":
+            # session_id is filled in per client from the server's replies
+            body = {"message": CHAT_MESSAGES[i % len(CHAT_MESSAGES)], "user_data": profile}
+        else:
+            body = {"plan_type": "diet" if i % 2 == 0 else "exercise", "health_data": profile}
+        bodies.append(json.dumps(body).encode())
+    return bodies
+
+
+def _client(port: int, path: str, bodies: List[bytes], offset: int, stride: int,
+            measure_from: float, deadline: float, samples: List):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    headers = {"Content-Type": "application/json", "Accept-Encoding": "gzip"}
+    i = offset
+    session_id, turns = None, 0
+    while True:
+        start = time.perf_counter()
+        if start >= deadline:
+            break
+        body = bodies[i % len(bodies)]
+        i += stride
+        if path == "/chat" and session_id is not None:
+            body = json.dumps(dict(json.loads(body), session_id=session_id)).encode()
+        try:
+            conn.request("POST", path, body=body, headers=headers)
+            response = conn.getresponse()
+            content = response.read()
+            status = response.status
+            if path == "/chat" and status == 200:
+                session_id, turns = _next_session(response, content, session_id, turns)
+            if response.getheader("Connection", "").lower() == "close":
+                conn.close()
+        except (OSError, http.client.HTTPException):
+            # Reconnects on the next request
+            conn.close()
+            status = "error"
+        samples.append((time.perf_counter() - start, status, start >= measure_from))
+    conn.close()
+
+
+def _next_session(response, content: bytes, session_id, turns: int):
+    """session_id to send with the next /chat turn, and the turn count so far"""
+    turns += 1
+    if turns >= CHAT_TURNS_PER_SESSION:
+        return None, 0
+    if response.getheader("Content-Encoding", "") == "gzip":
+        content = gzip.decompress(content)
+    # backend_server.py has no sessions and returns no session_id
+    returned = json.loads(content).get("session_id")
+    return (returned, turns) if returned else (session_id, turns)
+
+
+def load_endpoint(port: int, path: str, concurrency: int, duration: float, warmup: float,
+                  fake: FakeClaude) -> Dict:
+    bodies = request_bodies(path)
+    samples: List = []
+    claude_before = fake.stats()["requests"]
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+    threads = [
+        threading.Thread(target=_client, args=(port, path, bodies, n, concurrency,
+                                               measure_from, deadline, samples))
+        for n in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # Warm-up requests call Claude too, so the ratio uses every request sent
+    claude_per_request = (fake.stats()["requests"] - claude_before) / max(len(samples), 1)
+    samples = [(elapsed, status) for elapsed, status, measured in samples if measured]
+
+    statuses = Counter(str(status) for _, status in samples)
+    errors = sum(n for status, n in statuses.items() if not status.startswith("2"))
+    result = summarize([elapsed for elapsed, _ in samples])
+    result.update({
+        "requests": len(samples),
+        "rps": round(len(samples) / duration, 2),
+        "error_rate": round(errors / len(samples), 4) if samples else 1.0,
+        "status": dict(statuses),
+        "claude_calls_per_request": round(claude_per_request, 3),
+    })
+    return result
+
+
+def run(targets: List[str] = None, duration: float = 10.0, warmup: float = 2.0, concurrency: int = 8,
+        claude_latency_ms: float = 300, claude_jitter_ms: float = 100, claude_error_every: int = 0) -> Dict:
+    targets = targets or list(TARGET_ENDPOINTS)
+    fake = FakeClaude(latency_ms=claude_latency_ms, jitter_ms=claude_jitter_ms,
+                      error_every=claude_error_every).start()
+    results = {
+        "settings": {
+            "duration_seconds": duration,
+            "warmup_seconds": warmup,
+            "concurrency": concurrency,
+            "claude_latency_ms": claude_latency_ms,
+            "claude_jitter_ms": claude_jitter_ms,
+            "claude_spike_every": fake.spike_every,
+            "claude_spike_ms": fake.spike_ms,
+            "claude_error_every": claude_error_every,
+        },
+    }
+    try:
+        for target in targets:
+            print(f"[LOAD] Starting {target} against fake Claude at {fake.url}")
+            server = start_target(target, fake.url)
+            results[target] = {}
+            try:
+                for path in TARGET_ENDPOINTS[target]:
+                    stats = load_endpoint(server.port, path, concurrency, duration, warmup, fake)
+                    results[target][path] = stats
+                    print(f"[LOAD] {target:<6} {path:<9} {stats['rps']:>8.1f} req/s  "
+                          f"p50 {stats.get('p50_ms', 0):>8.1f} ms  p95 {stats.get('p95_ms', 0):>8.1f} ms  "
+                          f"p99 {stats.get('p99_ms', 0):>8.1f} ms  errors {stats['error_rate']:.2%}  "
+                          f"claude/req {stats['claude_calls_per_request']}")
+            finally:
+                server.stop()
+    finally:
+        fake.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endpoint load tests with a fake Claude backend")
+    parser.add_argument("--targets", default="api,server", help="Comma list of: api, server")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per endpoint")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--claude-latency-ms", type=float, default=300)
+    parser.add_argument("--claude-jitter-ms", type=float, default=100)
+    parser.add_argument("--claude-error-every", type=int, default=0)
+    parser.add_argument("--out", default="", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    result = run(args.targets.split(","), args.duration, args.warmup, args.concurrency,
+                 args.claude_latency_ms, args.claude_jitter_ms, args.claude_error_every)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"[OK] Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
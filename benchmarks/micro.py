@@ -0,0 +1,139 @@
+"""
+Micro-benchmarks for the inference path in backend_api.py.
+
+Times, at each batch size:
+  - encode_features   request -> scaled row, called once per row
+  - scaler_transform  scaler.transform on raw rows
+  - predict_proba     the loaded model (and the cascade, when enabled)
+  - predict_path      the async predict() used by /predict, batch 1 only
+
+backend_api is imported as-is, so the model, scaler, feature schema and
+cascade are exactly what the server would load from backend/models. When
+no model is found (fresh checkout, CI) a synthetic forest with the
+notebook's hyperparameters is fitted on random data instead and the
+results are marked "synthetic".
+
+Usage:
+    python micro.py
+    python micro.py --batch-sizes 1,100,10000 --min-seconds 1.0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from bench_common import backend_dir, random_profiles, time_call
+
+DEFAULT_BATCH_SIZES = [1, 10, 100, 1000, 10000]
+
+
+def load_backend(synthetic_trees: int):
+    """Import backend_api without side effects on the real audit log or Claude"""
+    # No startup test call, and audit rows go to a throwaway database
+    os.environ["CLAUDE_API_KEY"] = ""
+    os.environ.setdefault("AUDIT_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-audit-"), "audit.db"))
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+    import backend_api
+
+    synthetic = backend_api.model is None or backend_api.scaler is None
+    if synthetic:
+        fit_synthetic_model(backend_api, synthetic_trees)
+    return backend_api, synthetic
+
+
+def fit_synthetic_model(backend_api, n_estimators: int, n_rows: int = 5000, n_features: int = 277):
+    """Stand-in forest at the legacy 277-column width encode_features produces"""
+    from sklearn.preprocessing import StandardScaler
+
+    from model_configs import build_model
+
+    print(f"[MICRO] No model in backend/models, fitting a synthetic {n_estimators}-tree forest")
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(n_rows, n_features))
+    y = (X[:, :8] @ rng.normal(size=8) + rng.normal(scale=0.5, size=n_rows) > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = build_model("random_forest_final", n_estimators).fit(scaler.transform(X), y)
+    backend_api.model = model
+    backend_api.scaler = scaler
+
+
+def run(batch_sizes: List[int] = None, min_seconds: float = 0.5, synthetic_trees: int = 200) -> Dict:
+    batch_sizes = sorted(batch_sizes or DEFAULT_BATCH_SIZES)
+    api, synthetic = load_backend(synthetic_trees)
+    model, scaler = api.model, api.scaler
+
+    requests = [api.HealthData(**p) for p in random_profiles(max(batch_sizes))]
+    scaled = np.vstack([api.encode_features(d) for d in requests])
+    raw = scaler.inverse_transform(scaled)
+
+    candidates = {
+        "encode_features": lambda n: (lambda: [api.encode_features(d) for d in requests[:n]]),
+        "scaler_transform": lambda n: (lambda: scaler.transform(raw[:n])),
+        "predict_proba": lambda n: (lambda: model.predict_proba(scaled[:n])),
+    }
+    if api.cascade_model is not None:
+        candidates["cascade_predict_proba"] = lambda n: (lambda: api.cascade_model.predict_proba(scaled[:n]))
+
+    results = {}
+    for name, make in candidates.items():
+        results[name] = {}
+        for n in batch_sizes:
+            stats = time_call(make(n), min_seconds=min_seconds, min_runs=3)
+            stats["rows_per_s"] = round(n / (stats["p50_ms"] / 1000.0), 1) if stats["p50_ms"] else None
+            results[name][str(n)] = stats
+            print(f"[MICRO] {name:<22} batch {n:>6}: p50 {stats['p50_ms']:>10.3f} ms  "
+                  f"p95 {stats['p95_ms']:>10.3f} ms  {stats['rows_per_s'] or 0:>12,.0f} rows/s")
+
+    loop = asyncio.new_event_loop()
+    try:
+        stats = time_call(lambda: loop.run_until_complete(api.predict(requests[0])), min_seconds=min_seconds)
+    finally:
+        loop.close()
+    results["predict_path"] = {"1": stats}
+    print(f"[MICRO] {'predict_path':<22} batch {1:>6}: p50 {stats['p50_ms']:>10.3f} ms  "
+          f"p95 {stats['p95_ms']:>10.3f} ms")
+
+    api.audit_log.close()
+    return {
+        "model": {
+            "type": type(model).__name__,
+            "version": "synthetic" if synthetic else api.MODEL_VERSION,
+            "synthetic": synthetic,
+            "n_features": int(scaled.shape[1]),
+            "n_estimators": getattr(model, "n_estimators", None),
+            "n_jobs": getattr(model, "n_jobs", None),
+            "cascade": api.cascade_model is not None,
+        },
+        "benchmarks": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference micro-benchmarks")
+    parser.add_argument("--batch-sizes", default=",".join(map(str, DEFAULT_BATCH_SIZES)))
+    parser.add_argument("--min-seconds", type=float, default=0.5,
+                        help="Minimum timing window per benchmark")
+    parser.add_argument("--synthetic-trees", type=int, default=200,
+                        help="Trees in the stand-in forest when no model is installed")
+    parser.add_argument("--out", default="", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = run([int(b) for b in args.batch_sizes.split(",")], args.min_seconds, args.synthetic_trees)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"[OK] Results written to {args.out}")
+    print(f"[OK] Micro-benchmarks finished in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
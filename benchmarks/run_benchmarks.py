@@ -0,0 +1,180 @@
+"""
+Pre-deploy benchmark run: micro-benchmarks, endpoint load tests, regression checks.
+
+Runs micro.py and load.py, checks the numbers against thresholds.json
+and, optionally, a previous results file, then writes everything to
+results/<timestamp>-<commit>.json. Only a run with no failed checks is
+also copied to results/latest.json, so that file is always a passing
+baseline. Exits non-zero when any check fails, so it can gate a deploy.
+
+thresholds.json maps a dotted path into the results to a bound, e.g.
+    "load.api./predict.p95_ms": {"max": 250}
+    "load.api./predict.rps": {"min": 50}
+Paths missing from the results (a section that was skipped, no cascade
+installed) are reported and ignored.
+
+With --baseline, every p50/p95 latency and rps figure is also compared
+against the earlier run; a change worse than --max-regression (relative)
+and --min-delta-ms (absolute, for latencies) fails the run.
+
+Usage:
+    python run_benchmarks.py
+    python run_benchmarks.py --quick --skip-load
+    python run_benchmarks.py --baseline results/latest.json --max-regression 0.2
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Tuple
+
+from bench_common import environment
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+
+COMPARED_METRICS = ("p50_ms", "p95_ms", "rps")
+
+# Defaults for options --quick shortens; explicit values always win
+FULL_DEFAULTS = {"batch_sizes": "1,10,100,1000,10000", "min_seconds": 0.5, "duration": 10.0, "warmup": 2.0}
+QUICK_DEFAULTS = {"batch_sizes": "1,100,1000", "min_seconds": 0.2, "duration": 3.0, "warmup": 1.0}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run benchmarks and check for regressions")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--quick", action="store_true",
+                        help="Short windows and smaller batches, for a smoke run")
+    parser.add_argument("--batch-sizes", help=f"Default {FULL_DEFAULTS['batch_sizes']}")
+    parser.add_argument("--min-seconds", type=float, help=f"Default {FULL_DEFAULTS['min_seconds']}")
+    parser.add_argument("--synthetic-trees", type=int, default=200)
+    parser.add_argument("--targets", default="api,server")
+    parser.add_argument("--duration", type=float, help=f"Default {FULL_DEFAULTS['duration']}")
+    parser.add_argument("--warmup", type=float, help=f"Default {FULL_DEFAULTS['warmup']}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--claude-latency-ms", type=float, default=300)
+    parser.add_argument("--claude-jitter-ms", type=float, default=100)
+    parser.add_argument("--thresholds", default=os.path.join(bench_dir, "thresholds.json"))
+    parser.add_argument("--baseline", default="", help="Earlier results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=2.0)
+    parser.add_argument("--out-dir", default=os.path.join(bench_dir, "results"))
+    args = parser.parse_args()
+    for name, value in (QUICK_DEFAULTS if args.quick else FULL_DEFAULTS).items():
+        if getattr(args, name) is None:
+            setattr(args, name, value)
+    return args
+
+
+def lookup(results: Dict, path: str):
+    """Value at a dotted path, or None when any part is missing"""
+    node = results
+    for part in path.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return None
+        node = node[part]
+    return node
+
+
+def leaves(node: Dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for key, value in node.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from leaves(value, path)
+        elif key in COMPARED_METRICS and isinstance(value, (int, float)):
+            yield path, value
+
+
+def check_thresholds(results: Dict, thresholds: Dict) -> List[Dict]:
+    checks = []
+    for path, bound in thresholds.items():
+        value = lookup(results, path)
+        if value is None:
+            checks.append({"check": "threshold", "path": path, "status": "skipped"})
+            continue
+        failed = ("max" in bound and value > bound["max"]) or ("min" in bound and value < bound["min"])
+        checks.append({"check": "threshold", "path": path, "value": value, **bound,
+                       "status": "fail" if failed else "pass"})
+    return checks
+
+
+def check_baseline(results: Dict, baseline: Dict, max_regression: float, min_delta_ms: float) -> List[Dict]:
+    checks = []
+    for section in ("micro", "load"):
+        if section not in results or section not in baseline:
+            continue
+        for path, value in leaves(results[section], section):
+            before = lookup(baseline, path)
+            if not isinstance(before, (int, float)) or before <= 0:
+                continue
+            if path.endswith("rps"):
+                change = (before - value) / before
+                failed = change > max_regression
+            else:
+                change = (value - before) / before
+                failed = change > max_regression and value - before > min_delta_ms
+            checks.append({"check": "baseline", "path": path, "value": value, "baseline": before,
+                           "change": round(change, 4), "status": "fail" if failed else "pass"})
+    return checks
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    created = datetime.now(timezone.utc)
+    results = {"created": created.isoformat(timespec="seconds"), "environment": environment()}
+
+    if not args.skip_micro:
+        import micro
+
+        print("[BENCH] Micro-benchmarks")
+        results["micro"] = micro.run([int(b) for b in args.batch_sizes.split(",")],
+                                     args.min_seconds, args.synthetic_trees)
+    if not args.skip_load:
+        import load
+
+        print("[BENCH] Endpoint load tests")
+        results["load"] = load.run(args.targets.split(","), args.duration, args.warmup, args.concurrency,
+                                   args.claude_latency_ms, args.claude_jitter_ms)
+
+    checks = []
+    if os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            checks += check_thresholds(results, json.load(f))
+    if args.baseline:
+        with open(args.baseline) as f:
+            checks += check_baseline(results, json.load(f), args.max_regression, args.min_delta_ms)
+    failures = [c for c in checks if c["status"] == "fail"]
+    results["checks"] = checks
+    results["passed"] = not failures
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    commit = results["environment"]["git_commit"] or "nogit"
+    out_path = os.path.join(args.out_dir, f"{created:%Y%m%d-%H%M%S}-{commit}.json")
+    latest_path = os.path.join(args.out_dir, "latest.json")
+    # A failing run must not become the baseline for the next one
+    for path in [out_path] + ([latest_path] if not failures else []):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    for c in checks:
+        if c["status"] == "skipped":
+            print(f"[SKIP] {c['path']}: not measured")
+        elif c["status"] == "fail" and c["check"] == "threshold":
+            bound = f"<= {c['max']}" if "max" in c else f">= {c['min']}"
+            print(f"[FAIL] {c['path']} = {c['value']} (limit {bound})")
+        elif c["status"] == "fail":
+            print(f"[FAIL] {c['path']} = {c['value']} vs baseline {c['baseline']} ({c['change']:+.1%})")
+    passed = sum(c["status"] == "pass" for c in checks)
+    print(f"[BENCH] {passed} checks passed, {len(failures)} failed; results in {out_path}")
+    if failures:
+        print(f"[INFO] {latest_path} left unchanged; it still holds the last passing run")
+    print(f"[{'OK' if not failures else 'FAIL'}] Benchmarks finished in {time.perf_counter() - start:.1f}s")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1354,6 +1354,8 @@ class _ChatScreenState extends State<ChatScreen> with SingleTickerProviderStateM
   final ScrollController _scrollController = ScrollController();
   final List<Map<String, String>> _messages = [];
   bool _isLoading = false;
+  // Issued by the backend on the first reply; lets it keep conversation history
+  String? _sessionId;
   late AnimationController _animationController;
 
   @override
@@ -1405,6 +1407,7 @@ class _ChatScreenState extends State<ChatScreen> with SingleTickerProviderStateM
         body: jsonEncode({
           'message': message,
           'user_data': widget.initialHealthData,
+          if (_sessionId != null) 'session_id': _sessionId,
         }),
       ).timeout(
         const Duration(seconds: 60),
@@ -1421,6 +1424,10 @@ class _ChatScreenState extends State<ChatScreen> with SingleTickerProviderStateM
       if (response.statusCode == 200) {
         final data = jsonDecode(response.body);
         final assistantMessage = data['response'] as String;
+        final sessionId = data['session_id'];
+        if (sessionId is String) {
+          _sessionId = sessionId;
+        }
         if (mounted) {
           setState(() {
             _messages.add({'role': 'assistant', 'content': assistantMessage});